@@ -58,9 +58,11 @@ considered, so use the C++ implementation if speed is critical.
 
 #FIX:enable_points
 
+import os
 import struct
 import re
 from math import *
+import numpy as np
 
 class PAError(Exception):
     """
@@ -109,7 +111,8 @@ This is a Python class for reading/writing/modifying SIMION potential arrays.
         dz_mm           = None,
         fast_adjustable = None,
         enable_points   = None,
-        file            = None
+        file            = None,
+        mmap            = None
     ):
         """
 =head3 Constructor: PA
@@ -120,6 +123,12 @@ To load an array from a file, do
 
   pa = PA(file = 'buncher.pa#')
 
+To map a (large) array file into memory instead of reading it, do
+
+  pa = PA(file = 'buncher.pa0', mmap = 1)
+
+See the load method for details.
+
 To create an array from scratch (with all points initially set to 0V
 non-electrodes) do
 
@@ -174,6 +183,7 @@ omitted:
         self._file            = None
         self._error           = None
         self._pasharp         = None
+        self._field_grid      = None
 
         if file == None: # defaults
             if mode == None:            mode = -1
@@ -218,7 +228,8 @@ omitted:
             dz_mm           = dz_mm,
             fast_adjustable = fast_adjustable,
             enable_points   = enable_points,
-            file            = file
+            file            = file,
+            mmap            = mmap
         )
 
     def header_string(self):
@@ -287,11 +298,12 @@ Returns: string containing header information as text.
         return text
 
         
-    def load(self, path):
+    def load(self, path, mmap=False):
         """
 =head3 load
 
   pa.load(path)
+  pa.load(path, mmap)
 
 Loads a potential array from a file.
 
@@ -299,11 +311,18 @@ Note, arrays can also be loaded in the new method.
 Example:
 
   pa.load('myfile.pa#')
+  pa.load('myfile.pa0', 1)
 
 =over
 
 =item C<path> - string containing relative or absolute path to file.
 
+=item C<mmap> - Boolean indicating whether the point data is mapped
+into memory (numpy.memmap) rather than read.  Only the header is
+read then, and the pages of the point data are read from disk the
+first time they are touched.  The mapping is copy-on-write: setters
+work, but the changes never go back to the file (use save for that).
+
 =back
 
 On error, raises PAError.
@@ -341,13 +360,22 @@ On error, raises PAError.
             self._fast_adjustable = re.search('#$', path) != None
             # self._enable_points = 
 
-            fx = "d" * self._nx
             num_points = self._nx * self._ny * self._nz
-            self._points = [0] * num_points # allocate
-            for n in range(0, num_points, self._nx):
-                buf = f.read(self._nx * 8)
-                self._points[n:n+self._nx] = list(struct.unpack(fx, buf))
-            f.close()                
+            shape = (self._nz, self._ny, self._nx)
+            if mmap:
+                offset = f.tell()
+                f.close()
+                if os.path.getsize(path) < offset + num_points * 8:
+                    raise IOError("Bytes missing from file.")
+                self._points = np.memmap(path, dtype=np.float64, mode='c',
+                                         offset=offset, shape=shape)
+                self._field_grid = None
+            else:
+                points = np.fromfile(f, dtype=np.float64, count=num_points)
+                if points.size != num_points: raise IOError("Bytes missing from file.")
+                self._points = points.reshape(shape)
+                self._field_grid = None
+                f.close()
         except PAError as e:
             if f: f.close()
             raise PAError("Failed reading file \"" + path + "\": " + str(e))
@@ -378,6 +406,11 @@ On failure, raises PAError.
 =cut
         """
 
+        # a mapped array can not outlive the truncation of its own file
+        if isinstance(self._points, np.memmap) and \
+                os.path.abspath(path) == os.path.abspath(self._points.filename):
+            self._points = np.array(self._points)
+
         # normalize
         self._mirror_x &= 0x1;
         self._mirror_y &= 0x1;
@@ -403,11 +436,8 @@ On failure, raises PAError.
 
             f.write(header_str)
                                             
-            fx = "d" * self._nx
-            num_points = len(self._points)
-            for n in range(0, num_points, self._nx):
-                buf = struct.pack(fx, *self._points[n:n+self._nx])
-                f.write(buf)
+            f.flush()
+            np.ascontiguousarray(self._points, dtype=np.float64).tofile(f)
 
             # record stats in PA0 file.
             if self._pasharp != None:
@@ -417,20 +447,18 @@ On failure, raises PAError.
 
                 first_idx = [-1] * 31
 
-                for n in range(0, num_points):
-                    fval = self._pasharp._points[n]
-                    if fval >= 2 * self._pasharp.max_voltage():  # electrode
-                        fval -= 2 * self._pasharp.max_voltage()
-    
-                        ival = int(fval)
-                        if ival == fval and ival >= 1 and ival <= 30: # fast adjustable
-                            if first_idx[ival] == -1:
-                                # print ival, " ", n, "\n"
-                                first_idx[ival] = n;
-                        elif first_idx[0] == -1: # fast scalable
-                            first_idx[0] = n
+                # decode electrode types of PA# in one pass over the flat array.
+                pasharp_points = self._pasharp._points.reshape(-1)
+                electrode_idx = np.flatnonzero(pasharp_points >= 2 * self._pasharp.max_voltage())
+                fvals = pasharp_points[electrode_idx] - 2 * self._pasharp.max_voltage()
+                # fast adjustable electrodes are integer valued 1..30
+                fast = (fvals == np.trunc(fvals)) & (fvals >= 1) & (fvals <= 30)
+                ivals, first = np.unique(fvals[fast].astype(int), return_index=True)
+                for ival, n in zip(ivals, electrode_idx[fast][first]):
+                    first_idx[int(ival)] = int(n)
+                if not fast.all(): # fast scalable
+                    first_idx[0] = int(electrode_idx[np.argmin(fast)])
 
-    
                 num_electrodes = (first_idx[0] != -1) and 1 or 0;
                 for n in range(1, 31):
                     if first_idx[n] != -1:
@@ -569,15 +597,11 @@ the maximum potential in the array.
         if max_voltage == None: return self._max_voltage
         assert self.check_max_voltage(max_voltage), self.error()
 
-        num_points = self._nx * self._ny * self._nz
-
         old_max_voltage = self._max_voltage
         diff = -2 * self._max_voltage + 2 * max_voltage
 
         self._max_voltage = max_voltage
-        for n in range(num_points):
-            if self._points[n] > old_max_voltage:
-                self._points[n] += diff
+        self._points[self._points > old_max_voltage] += diff
 
     def mirror(self, mirror=None):
         """
@@ -618,6 +642,7 @@ Returns: mirror (if getting)
             self._mirror_x = m.group(1) != ''
             self._mirror_y = m.group(2) != ''
             self._mirror_z = m.group(3) != ''
+            self._field_grid = None
 
     def mirror_x(self, mirror_x=None):
         """
@@ -636,6 +661,7 @@ direction.
         """
         if mirror_x == None: return self._mirror_x
         self._mirror_x = not not mirror_x
+        self._field_grid = None
 
     def mirror_y(self, mirror_y=None):
         """
@@ -661,6 +687,7 @@ direction.
             mirror_z = self._mirror_z
         ), self.error()
         self._mirror_y = not not mirror_y
+        self._field_grid = None
 
     def mirror_z(self, mirror_z=None):
         """
@@ -686,6 +713,7 @@ direction.
             mirror_z = mirror_z
         ), self.error()
         self._mirror_z = not not mirror_z
+        self._field_grid = None
 
     def ng(self, ng=None):
         """
@@ -907,7 +935,8 @@ Returns: PA# potential array object
         dz_mm=None,
         fast_adjustable=None,
         enable_points=None,
-        file=None
+        file=None,
+        mmap=None
     ):
         """
 =head3 set
@@ -935,7 +964,7 @@ See the individual setter methods for details on each parameter.
                enable_points == None and dx_mm == None and \
                dy_mm == None and dz_mm == None, \
                 "Named parameter 'file' cannot coexist with other named parameters."
-            self.load(file);
+            self.load(file, mmap);
         else:
             # aliases
             if mirror != None:
@@ -1015,6 +1044,8 @@ See the individual setter methods for details on each parameter.
             if dx_mm != None: self._dx_mm = dx_mm
             if dy_mm != None: self._dy_mm = dy_mm
             if dz_mm != None: self._dz_mm = dz_mm
+            # the cached field depends on the symmetry and the mirroring
+            self._field_grid = None
     #FIX:not throws?
             if nx != None and (nx != self._nx or ny != self._ny or nz != self._nz):
                 self.size(nx, ny, nz)
@@ -1062,7 +1093,8 @@ Returns: (nx, ny, nz) tuple (if getting)
         self._ny = ny;
         self._nz = nz;
 
-        self._points = [0] * (nx * ny * nz)
+        self._points = np.zeros((nz, ny, nx), dtype=np.float64)
+        self._field_grid = None
 
     def symmetry(self, symmetry=None):
         """
@@ -1096,6 +1128,7 @@ Returns: symmetry (if getting).
             mirror_z = self._mirror_z
         ), self.error()
         self._symmetry = symmetry
+        self._field_grid = None
 
     def dx_mm(self, value=None):
         """
@@ -1120,6 +1153,7 @@ Gets or sets the grid unit size (mm) in the x direction.  Requires SIMION 8.1.
         if value == None: return self._dx_mm
         assert self.check_dx_mm(value), self.error()
         self._dx_mm = value
+        self._field_grid = None
 
     def dy_mm(self, value=None):
         """
@@ -1144,6 +1178,7 @@ Gets or sets the grid unit size (mm) in the y direction.  Requires SIMION 8.1.
         if value == None: return self._dy_mm
         assert self.check_dy_mm(value), self.error()
         self._dy_mm = value
+        self._field_grid = None
 
     def dz_mm(self, value=None):
         """
@@ -1168,6 +1203,7 @@ Gets or sets the grid unit size (mm) in the z direction.  Requires SIMION 8.1.
         if value == None: return self._dz_mm
         assert self.check_dz_mm(value), self.error()
         self._dz_mm = value
+        self._field_grid = None
 
     # Group: Boundary and Coordinates
 
@@ -1301,8 +1337,93 @@ Returns: Boolean indicating whether voxel is inside.
     # Group: Point Setters/Getters:
 
     def clear_points(self):
-        for n in range(0, self.num_points()):
-            self._points[n] = 0.0
+        self._points.fill(0.0)
+        self._field_grid = None
+
+    @property
+    def array(self):
+        """
+=head3 array
+
+  points = pa.array
+
+Gets the raw point values of the whole array as a read-only numpy
+array of shape (nz, ny, nx), so that a point is addressed as
+points[z, y, x].  No data is copied.
+
+The values are the raw ones (see the raw method): electrode points
+are offset by 2 * max_voltage().
+
+  electrodes = pa.array > pa.max_voltage()
+
+=cut
+        """
+        view = self._points.view()
+        view.flags.writeable = False
+        return view
+
+    def electrode_mask(self):
+        """
+=head3 electrode_mask
+
+  mask = pa.electrode_mask()
+
+Gets the Boolean electrode state of all the points of the array at once.
+
+  mask = pa.electrode_mask()
+  print mask[30, 20, 10]    # same as pa.electrode(10, 20, 30)
+
+Returns: Boolean numpy array of shape (nz, ny, nx).
+
+=cut
+        """
+        return self._points > self._max_voltage
+
+    def electrode_types(self):
+        """
+=head3 electrode_types
+
+  types = pa.electrode_types()
+
+Gets the electrode numbers of all the points of the array at once.
+
+For electrode points this is the integer part of the potential (the
+electrode number of a PA# file, or the fast-adjust electrode it belongs
+to), i.e. int(pa.potential(x, y, z)); non-electrode points are 0.
+Values are expected to fit into int8 (SIMION fast-adjust electrodes
+are numbered 1 to 30).
+
+  types = pa.electrode_types()
+  print types[30, 20, 10]    # electrode number of point (10, 20, 30)
+
+Returns: int8 numpy array of shape (nz, ny, nx).
+
+=cut
+        """
+        raw = self._points
+        mask = raw > self._max_voltage
+        types = np.zeros(raw.shape, dtype=np.int8)
+        types[mask] = np.trunc(raw[mask] - 2 * self._max_voltage)
+        return types
+
+    def potentials(self):
+        """
+=head3 potentials
+
+  potentials = pa.potentials()
+
+Gets the potentials of all the points of the array at once
+(both electrode and non-electrode points).
+
+  potentials = pa.potentials()
+  print potentials[30, 20, 10]    # same as pa.potential(10, 20, 30)
+
+Returns: float64 numpy array of shape (nz, ny, nx).
+
+=cut
+        """
+        raw = self._points
+        return np.where(raw > self._max_voltage, raw - 2 * self._max_voltage, raw)
 
     #FIX:use xi rather than x to denote integer points
     def electrode(self, x, y, z=0, is_electrode=None):
@@ -1336,10 +1457,11 @@ Returns: Boolean indicating whether point is an electrode (if getting).
         """
         assert self.inside(x,y,z), self._fail_point(x,y,z)
 
-        pos = (z * self._ny + y) * self._nx + x
+        pos = (z, y, x)
         if is_electrode == None:
             return (self._points[pos] > self._max_voltage)
         else:
+            self._field_grid = None
             if self._points[pos] > self._max_voltage:
                 if not is_electrode: self._points[pos] -= 2 * self._max_voltage
             else:
@@ -1492,6 +1614,144 @@ containing the x, y, and z components of the field vector respectively.
                 Ez *= self._ng
             return (Ex, Ey, Ez)
 
+    def field_real_many(self, xs, ys, zs=0):
+        """
+=head3 field_real_many
+
+  (exs, eys, ezs) = pa.field_real_many(xs, ys, zs)
+
+Gets the electrostatic or magnetic field vectors at many real points
+at once, taking symmetry and mirroring into account.
+
+This is the vectorized form of field_real, built on
+potential_real_many.
+
+  xs = numpy.linspace(-10.5, 10.5, 100)
+  (exs, eys, ezs) = pa.field_real_many(xs, 20.2, 30.7)
+
+=over
+
+=item C<xs> - array of real numbers containing x positions in grid points.
+
+=item C<ys> - array of real numbers containing y positions in grid points.
+
+=item C<zs> - array of real numbers containing z positions in grid points.
+
+=back
+
+The arrays are broadcast against each other.
+
+Returns: (exs, eys, ezs) tuple of numpy arrays containing the x, y, and z
+components of the field vectors respectively.
+
+=cut
+        """
+        x, y, z = np.broadcast_arrays(
+            np.asarray(xs, dtype=np.float64),
+            np.asarray(ys, dtype=np.float64),
+            np.asarray(zs, dtype=np.float64))
+        assert np.all(self._inside_real_many(x, y, z)), \
+            "points out of bounds (" + \
+            str(self._nx) + "," + str(self._ny) + "," + str(self._nz) + ")."
+
+        min_x = self.mirror_x() and -(self._nx-1) or 0
+        xm = np.maximum(x - 0.5, min_x)
+        xp = np.minimum(x + 0.5, self._nx-1)
+
+        if self._symmetry == 'cylindrical':
+            r = np.sqrt(y*y + z*z)
+
+            rm = np.maximum(r - 0.5, -(self._ny-1))
+            rp = np.minimum(r + 0.5, self._ny-1)
+
+            zero = np.zeros_like(x)
+            V2 = self.potential_real_many(xp, r,  zero)
+            V1 = self.potential_real_many(xm, r,  zero)
+            V4 = self.potential_real_many(x,  rp, zero)
+            V3 = self.potential_real_many(x,  rm, zero)
+
+            Ex = (V1 - V2) / (xp - xm)
+            Er = (V3 - V4) / (rp - rm)
+            on_axis = (r == 0)
+            safe_r = np.where(on_axis, 1.0, r)
+            Ey = Er * np.where(on_axis, 1.0, y / safe_r)
+            Ez = Er * np.where(on_axis, 0.0, z / safe_r)
+        else: # planar
+            min_y = self.mirror_y() and -(self._ny-1) or 0
+            ym = np.maximum(y - 0.5, min_y)
+            yp = np.minimum(y + 0.5, self._ny-1)
+
+            V2 = self.potential_real_many(xp, y,  z)
+            V1 = self.potential_real_many(xm, y,  z)
+            V4 = self.potential_real_many(x,  yp, z)
+            V3 = self.potential_real_many(x,  ym, z)
+            Ex = (V1 - V2) / (xp - xm)
+            Ey = (V3 - V4) / (yp - ym)
+            if self._nz != 1:
+                min_z = self.mirror_z() and -(self._nz-1) or 0
+                zm = np.maximum(z - 0.5, min_z)
+                zp = np.minimum(z + 0.5, self._nz-1)
+                V6 = self.potential_real_many(x, y, zp)
+                V5 = self.potential_real_many(x, y, zm)
+                Ez = (V5 - V6) / (zp - zm)
+            else:
+                Ez = np.zeros_like(Ex)
+
+        if self._field_type == 'magnetic':
+            Ex *= self._ng
+            Ey *= self._ng
+            Ez *= self._ng
+        return (Ex, Ey, Ez)
+
+    def field_grid(self):
+        """
+=head3 field_grid
+
+  (ex, ey, ez) = pa.field_grid()
+
+Gets the field vectors at all the grid points of the array.
+
+The result is the same as calling field(x, y, z) for every point, but
+it is computed in a few whole-array operations.  It is cached on the
+array, so that the following calls are free until the points are
+changed.
+
+  (ex, ey, ez) = pa.field_grid()
+  print ex[30, 20, 10]    # same as pa.field(10, 20, 30)[0]
+
+Returns: (ex, ey, ez) tuple of read-only numpy arrays of shape
+(nz, ny, nx), containing the x, y, and z components of the field
+vectors respectively.  For cylindrical arrays the points lie in the
+z = 0 plane, so ey is the radial component and ez is zero.
+
+=cut
+        """
+        key = (self._field_type, self._ng)
+        if self._field_grid is not None and self._field_grid[0] == key:
+            return self._field_grid[1]
+
+        raw = self._points
+        V = np.where(raw > self._max_voltage, raw - 2 * self._max_voltage, raw)
+
+        Ex = self._grid_field_component(V, 2, self.mirror_x())
+        if self._symmetry == 'cylindrical':
+            Ey = self._grid_field_component(V, 1, 1)
+        else:
+            Ey = self._grid_field_component(V, 1, self.mirror_y())
+        if self._nz != 1:
+            Ez = self._grid_field_component(V, 0, self.mirror_z())
+        else:
+            Ez = np.zeros_like(V)
+
+        if self._field_type == 'magnetic':
+            Ex *= self._ng
+            Ey *= self._ng
+            Ez *= self._ng
+        for component in (Ex, Ey, Ez):
+            component.flags.writeable = False
+        self._field_grid = (key, (Ex, Ey, Ez))
+        return self._field_grid[1]
+
     def point(self, x, y, z=0, is_electrode = None, potential=None):
         """
 =head3 point
@@ -1534,7 +1794,7 @@ Returns: (is_electrode, potential) tuple (if getting).
         """
         assert self.inside(x,y,z), self._fail_point(x,y,z)
 
-        pos = (z * self._ny + y) * self._nx + x
+        pos = (z, y, x)
 
         if is_electrode != None and potential == None: potential = 0.0
 
@@ -1546,9 +1806,57 @@ Returns: (is_electrode, potential) tuple (if getting).
         else:
             if potential > self._max_voltage:
                 self.max_voltage(potential * 2.0)
+            self._field_grid = None
             self._points[pos] = potential
             if is_electrode: self._points[pos] += 2 * self._max_voltage
 
+    def set_points_from_mask(self, mask, potentials, is_electrode=1):
+        """
+=head3 set_points_from_mask
+
+  pa.set_points_from_mask(mask, potentials)
+  pa.set_points_from_mask(mask, potentials, is_electrode)
+
+Sets the Boolean electrode state and the potential of all the points
+selected by a mask in one operation.
+
+This is the same as calling point(x, y, z, is_electrode, potential)
+for every selected point, except that max_voltage is checked once,
+up front: if any of the potentials exceeds it, it is raised to twice
+the largest potential.
+
+  mask = pa.electrode_mask()
+  pa.set_points_from_mask(mask, 5.0)    # all electrodes to 5V
+
+=over
+
+=item C<mask> - Boolean numpy array of shape (nz, ny, nx) selecting the points.
+
+=item C<potentials> - number or numpy array of the same shape as mask
+containing the potentials (for instance electrode numbers of a PA#).
+Values of unselected points are ignored.
+
+=item C<is_electrode> - Boolean indicating whether the points are electrodes.
+
+=back
+
+=cut
+        """
+        mask = np.asarray(mask, dtype=bool)
+        assert mask.shape == self._points.shape, \
+            "mask shape " + str(mask.shape) + " does not match (nz, ny, nx) " + \
+            str(self._points.shape) + "."
+        potentials = np.broadcast_to(
+            np.asarray(potentials, dtype=np.float64), mask.shape)[mask]
+        if potentials.size == 0: return
+
+        max_potential = potentials.max()
+        if max_potential > self._max_voltage:
+            self.max_voltage(max_potential * 2.0)
+        self._field_grid = None
+        if is_electrode: potentials = potentials + 2 * self._max_voltage
+        self._points[mask] = potentials
+
     def potential(self, x, y, z=0, potential=None):
         """
 =head3 potential
@@ -1579,7 +1887,7 @@ Returns: potential (if getting).
         """
         assert self.inside(x,y,z), self._fail_point(x,y,z)
 
-        pos = (z * self._ny + y) * self._nx + x
+        pos = (z, y, x)
         is_electrode = (self._points[pos] > self._max_voltage)
 
         if potential == None:
@@ -1589,6 +1897,7 @@ Returns: potential (if getting).
         else:
             if potential > self._max_voltage:
                 self.max_voltage(potential * 2.0)
+            self._field_grid = None
             self._points[pos] = potential
             if is_electrode: self._points[pos] += 2 * self._max_voltage
 
@@ -1693,6 +2002,110 @@ Returns: real number containing interpolated potential value.
 
         return p
 
+    def potential_real_many(self, xs, ys, zs=0):
+        """
+=head3 potential_real_many
+
+  potentials = pa.potential_real_many(xs, ys, zs)
+
+Gets the potentials at many real points at once, taking symmetry and
+mirroring into account.
+
+This is the vectorized form of potential_real: the same interpolation
+is applied, but on whole numpy arrays of coordinates, which is much
+faster than calling potential_real point by point.
+
+  xs = numpy.linspace(-10.5, 10.5, 100)
+  print pa.potential_real_many(xs, 20.2, 30.7)
+
+=over
+
+=item C<xs> - array of real numbers containing x positions in grid points.
+
+=item C<ys> - array of real numbers containing y positions in grid points.
+
+=item C<zs> - array of real numbers containing z positions in grid points.
+
+=back
+
+The arrays are broadcast against each other.
+
+Returns: numpy array of interpolated potential values.
+
+=cut
+        """
+        xs, ys, zs = np.broadcast_arrays(
+            np.asarray(xs, dtype=np.float64),
+            np.asarray(ys, dtype=np.float64),
+            np.asarray(zs, dtype=np.float64))
+        assert np.all(self._inside_real_many(xs, ys, zs)), \
+            "points out of bounds (" + \
+            str(self._nx) + "," + str(self._ny) + "," + str(self._nz) + ")."
+
+        xeff = np.abs(xs)  # if mirroring
+        yeff = np.abs(ys)
+        zeff = np.abs(zs)
+
+        if self._symmetry == 'planar':
+            if self._nz == 1: # 2D
+                xi = xeff.astype(np.intp)
+                yi = yeff.astype(np.intp)
+
+                wx = xeff - xi
+                wy = yeff - yi
+                # the clipping only protects the indexes in cases where
+                # xi + 1 == nx or yi + 1 == ny: the weight is zero there.
+                xi1 = np.minimum(xi + 1, self._nx - 1)
+                yi1 = np.minimum(yi + 1, self._ny - 1)
+                zi = np.zeros_like(xi)
+                p = \
+                    (1-wx) * (1-wy) * self._potentials_many(xi,  yi,  zi) + \
+                       wx  * (1-wy) * self._potentials_many(xi1, yi,  zi) + \
+                    (1-wx) *    wy  * self._potentials_many(xi,  yi1, zi) + \
+                       wx  *    wy  * self._potentials_many(xi1, yi1, zi)
+
+            else: # 3D
+                xi = xeff.astype(np.intp)
+                yi = yeff.astype(np.intp)
+                zi = zeff.astype(np.intp)
+
+                wx = xeff - xi
+                wy = yeff - yi
+                wz = zeff - zi
+
+                xi1 = np.minimum(xi + 1, self._nx - 1)
+                yi1 = np.minimum(yi + 1, self._ny - 1)
+                zi1 = np.minimum(zi + 1, self._nz - 1)
+                p = \
+                    (1-wx)*(1-wy)*(1-wz)*self._potentials_many(xi,  yi,  zi) + \
+                       wx *(1-wy)*(1-wz)*self._potentials_many(xi1, yi,  zi) + \
+                    (1-wx)*   wy *(1-wz)*self._potentials_many(xi,  yi1, zi) + \
+                       wx *   wy *(1-wz)*self._potentials_many(xi1, yi1, zi) + \
+                    (1-wx)*(1-wy)*   wz *self._potentials_many(xi,  yi,  zi1) + \
+                       wx *(1-wy)*   wz *self._potentials_many(xi1, yi,  zi1) + \
+                    (1-wx)*   wy *   wz *self._potentials_many(xi,  yi1, zi1) + \
+                       wx *   wy *   wz *self._potentials_many(xi1, yi1, zi1)
+
+        elif self._symmetry == 'cylindrical':
+            r = np.sqrt(ys*ys + zs*zs)
+
+            xi = xeff.astype(np.intp)
+            ri = r.astype(np.intp)
+            wx = xeff - xi
+            wr = r - ri
+            xi1 = np.minimum(xi + 1, self._nx - 1)
+            ri1 = np.minimum(ri + 1, self._ny - 1)
+            zi = np.zeros_like(xi)
+            p = \
+                (1-wx) * (1-wr) * self._potentials_many(xi,  ri,  zi) + \
+                   wx  * (1-wr) * self._potentials_many(xi1, ri,  zi) + \
+                (1-wx) *    wr  * self._potentials_many(xi,  ri1, zi) + \
+                   wx  *    wr  * self._potentials_many(xi1, ri1, zi)
+
+        else: assert 0, "internal error: bad symmetry (" + self._symmetry + ")"
+
+        return p
+
     def solid(self, x, y, z=0, is_electrode=None):
         """
 =head3 solid
@@ -1801,11 +2214,12 @@ Returns: real number containing raw value.
         """
         assert self.inside(x,y,z), self._fail_point(x,y,z)
 
-        pos = (z * self._ny + y) * self._nx + x
+        pos = (z, y, x)
 
         if val == None:
             return self._points[pos]
         else:
+            self._field_grid = None
             self._points[pos] = val
 
 
@@ -2348,6 +2762,44 @@ Get last error message generated by one of the check calls.
             yes = (r <= self._ny - 1)
         return yes
 
+    def _inside_real_many(self, x, y, z):
+        # vectorized inside_real
+        def inside_axis(c, n, mirror):
+            return (c >= 0.0) & (c <= n-1) | \
+                   bool(mirror) & (c < 0.0) & (-c <= n-1)
+
+        yes = inside_axis(x, self._nx, self.mirror_x())
+        if self._symmetry == 'planar':
+            yes = yes & inside_axis(y, self._ny, self.mirror_y())
+            if self._nz != 1: # infinite extent
+                yes = yes & inside_axis(z, self._nz, self.mirror_z())
+        elif self._symmetry == 'cylindrical':
+            yes = yes & (np.sqrt(y*y + z*z) <= self._ny - 1)
+        else: assert 0, "internal error: bad symmetry (" + self._symmetry + ")"
+        return yes
+
+    def _potentials_many(self, xi, yi, zi):
+        # vectorized potential getter on integer index arrays
+        raw = self._points[zi, yi, xi]
+        return np.where(raw > self._max_voltage, raw - 2 * self._max_voltage, raw)
+
+    def _grid_field_component(self, V, axis, mirror):
+        # -dV/d(axis) at the grid points, sampled at +-0.5 grid unit
+        # exactly like field_real does it.
+        V = np.moveaxis(V, axis, 0)
+        E = np.empty_like(V)
+        half = 0.5 * V
+        # interior: V(i-0.5) and V(i+0.5) are the means of the neighbours
+        E[1:-1] = ((half[:-2] + half[1:-1]) - (half[1:-1] + half[2:])) / 1.0
+        # lower border
+        if mirror: # V(-0.5) == V(0.5)
+            E[0] = 0.0
+        else:
+            E[0] = (V[0] - (half[0] + half[1])) / 0.5
+        # upper border
+        E[-1] = ((half[-2] + half[-1]) - V[-1]) / 0.5
+        return np.moveaxis(E, 0, axis)
+
     def _set_field(self, x, y, z, field_x, field_y, field_z=0):
         # perform numerical integration to solve the following for V:
         #
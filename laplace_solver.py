@@ -0,0 +1,599 @@
+"""
+module for refining PA files without SIMION: solving of the Laplace equation on the grid of PA
+"""
+import copy
+import os
+import time
+import typing
+from dataclasses import dataclass
+
+import numpy as np
+
+from SIMION.PA import PA
+
+FAST_ADJUST_VOLTAGE = 10000.0  # the potential of the electrode in the .pa1...paN solutions
+FAST_ADJUSTABLE_TYPES = range(1, 31)  # SIMION supports only 30 fast adjustable electrodes
+
+
+@dataclass
+class SolverSettings:
+    """settings of the numpy refine (the analog of SIMION refine options)"""
+    method: str = "sor"  # "sor", "multigrid" or "sparse" (direct solution with scipy)
+    convergence: float = 5e-3  # the maximal change of the potential (V) on the last iteration
+    max_iterations: int = 100000  # iterations of SOR or V-cycles of multigrid
+    omega: typing.Optional[float] = None  # over-relaxation factor. The optimal for the grid if None
+    pre_smoothing: int = 2  # red-black Gauss-Seidel sweeps before the coarse grid correction
+    post_smoothing: int = 2  # and after it
+    full_multigrid: bool = True  # start V-cycles from the solution interpolated from the coarser grids
+    coarsest_size: int = 5  # do not make the grids coarser than this number of points
+    warm_start_margin: int = 3  # points around the changed electrodes relaxed first when refining from the previous
+
+
+class LaplaceGrid:
+    """
+    The discrete Laplace operator on the grid of the PA.
+    Arrays are in the PA order (nz, ny, nx). All the borders are reflective: the mirror planes x=0, y=0, z=0
+    and the far borders (SIMION uses zero normal field there).
+    For the cylindrical symmetry of PA x is the axis and y is the radius (nz=1).
+    The coarse grids of multigrid keep the far border point, so its last step can be shorter.
+    The operator is symmetric with the scalar product weighted by the volumes of the points
+    """
+
+    def __init__(self, shape: typing.Tuple[int, int, int], cylindrical=False,
+                 positions: typing.Optional[typing.Dict[int, np.ndarray]] = None):
+        """
+        :param shape: the shape of arrays (nz, ny, nx)
+        :param cylindrical: x is the axis and y is the radius
+        :param positions: coordinates of the points (in grid units of PA) for each axis. 0, 1, 2, ... by default
+        """
+        self.shape = tuple(shape)
+        self.cylindrical = cylindrical
+        self.positions = {}
+        # the axes that `coarse` makes twice coarser, the others are kept (all the axes by default, see `_levels`)
+        self.coarse_axes: typing.Optional[typing.Tuple[int, ...]] = None
+        # weights of the neighbours (minus, plus) for each axis of the array. Axis with one point are skipped
+        self.weights = {}
+        self.volume = np.ones((1, 1, 1))
+        for axis, n in enumerate(self.shape):
+            if n == 1:
+                continue
+            x = positions[axis] if positions else np.arange(n, dtype=float)
+            self.positions[axis] = x
+            steps = np.diff(x)
+            # the reflected point is at the same distance as the inner neighbour
+            h_minus = np.concatenate((steps[:1], steps))
+            h_plus = np.concatenate((steps, steps[-1:]))
+            w_minus = 2 / (h_minus * (h_minus + h_plus))
+            w_plus = 2 / (h_plus * (h_minus + h_plus))
+            if cylindrical and axis == 1:
+                # d2/dr2 + 1/r d/dr. On the axis it is 2 d2/dr2
+                first_derivative = 1 / (x[1:] * (h_minus[1:] + h_plus[1:]))
+                w_minus[1:] -= first_derivative
+                w_plus[1:] += first_derivative
+                w_minus[0] *= 2
+                w_plus[0] *= 2
+            self.weights[axis] = (self._along(w_minus, axis), self._along(w_plus, axis))
+            self.volume = self.volume * self._along(self._axis_volume(axis, x), axis)
+        self.diag = sum(w_minus + w_plus for w_minus, w_plus in self.weights.values())
+
+    def _axis_volume(self, axis: int, x: np.ndarray) -> np.ndarray:
+        """the part of the volume of each point along the `axis`. The border points have a half of it"""
+        steps = np.diff(x)
+        v = np.concatenate((steps[:1], x[2:] - x[:-2], steps[-1:])) / 2
+        if self.cylindrical and axis == 1:
+            # the ring of radius r. On the axis it is the disk of radius h/2
+            v[1:] *= x[1:]
+            v[0] *= steps[0] / 4
+        return v
+
+    def _along(self, w: np.ndarray, axis: int) -> np.ndarray:
+        """reshape 1D array to broadcast along the `axis`"""
+        shape = [1, 1, 1]
+        shape[axis] = len(w)
+        return w.reshape(shape)
+
+    def neighbour_sum(self, phi: np.ndarray) -> np.ndarray:
+        """weighted sum of the neighbours of each point. The point outside the border is the reflection"""
+        s = np.zeros(self.shape)
+        for axis, (w_minus, w_plus) in self.weights.items():
+            lo = [slice(None)] * 3
+            hi = [slice(None)] * 3
+            lo[axis] = slice(None, -1)
+            hi[axis] = slice(1, None)
+            lo, hi = tuple(lo), tuple(hi)
+            minus = np.empty(self.shape)
+            minus[hi] = phi[lo]
+            minus[_index(axis, 0)] = phi[_index(axis, 1)]
+            plus = np.empty(self.shape)
+            plus[lo] = phi[hi]
+            plus[_index(axis, -1)] = phi[_index(axis, -2)]
+            s += w_minus * minus + w_plus * plus
+        return s
+
+    def jacobi(self, phi: np.ndarray, f: typing.Optional[np.ndarray] = None) -> np.ndarray:
+        """the potential that satisfy the equation in each point if the neighbours are fixed"""
+        s = self.neighbour_sum(phi)
+        if f is not None:
+            s += f
+        return s / self.diag
+
+    def residual(self, phi: np.ndarray, f: np.ndarray) -> np.ndarray:
+        """residual of the equation `diag*phi - neighbour_sum(phi) = f` (the Laplace equation for f=0)"""
+        return f - self.diag * phi + self.neighbour_sum(phi)
+
+    def _coarse_points(self, axis: int) -> np.ndarray:
+        """the points of this grid that are kept on the coarse grid: the even ones and the last one"""
+        n = self.shape[axis]
+        if self.coarse_axes is not None and axis not in self.coarse_axes:
+            return np.arange(n)
+        points = np.arange(0, n, 2)
+        if n % 2 == 0:
+            points = np.append(points, n - 1)
+        return points
+
+    def _interpolation(self, axis: int) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        the coarse points, the points between them
+        and the weight of the right coarse neighbour in the linear interpolation for them
+        """
+        n = self.shape[axis]
+        points = self._coarse_points(axis)
+        between = np.ones(n, dtype=bool)
+        between[points] = False
+        between = np.flatnonzero(between)
+        x = self.positions[axis]
+        t = (x[between] - x[between - 1]) / (x[between + 1] - x[between - 1])
+        return points, between, t
+
+    def coarse(self) -> "LaplaceGrid":
+        """the grid with twice the step along `coarse_axes`"""
+        shape = list(self.shape)
+        positions = {}
+        for axis, x in self.positions.items():
+            points = self._coarse_points(axis)
+            shape[axis] = len(points)
+            positions[axis] = x[points]
+        return LaplaceGrid(tuple(shape), cylindrical=self.cylindrical, positions=positions)
+
+    def restrict(self, a: np.ndarray, how="weighting") -> np.ndarray:
+        """
+        transfer the array to the coarse grid.
+        :param how: "weighting" - transposed interpolation weighted by the volumes of the points
+          (full weighting 1/4, 1/2, 1/4 for the uniform grid) for the residuals,
+          "max" - maximum over the neighbours (to keep thin electrodes as fixed points)
+          "inject" - just the coarse points
+        """
+        for axis, n in enumerate(self.shape):
+            if n == 1:
+                continue
+            a = np.moveaxis(a, axis, 0)
+            points, between, t = self._interpolation(axis)
+            # the neighbours of the coarse points, reflected on the borders
+            left = np.where(points == 0, 1, points - 1)
+            right = np.where(points == n - 1, n - 2, points + 1)
+            if how == "weighting":
+                x = self.positions[axis]
+                a = a * _column(self._axis_volume(axis, x), a.ndim)
+                coarse = a[points]
+                t = _column(t, a.ndim)
+                coarse[between // 2] += (1 - t) * a[between]
+                coarse[between // 2 + 1] += t * a[between]
+                a = coarse / _column(self._axis_volume(axis, x[points]), a.ndim)
+            elif how == "max":
+                # only the points between coarse ones. The other neighbours are on the coarse grid themselves
+                is_between = np.zeros(n, dtype=bool)
+                is_between[between] = True
+                left = np.where(is_between[left], left, points)
+                right = np.where(is_between[right], right, points)
+                a = np.maximum(np.maximum(a[left], a[points]), a[right])
+            else:
+                a = a[points]
+            a = np.moveaxis(a, 0, axis)
+        return a
+
+    def prolong(self, a: np.ndarray) -> np.ndarray:
+        """linear interpolation from the coarse grid to this grid"""
+        for axis, n in enumerate(self.shape):
+            if n == 1:
+                continue
+            a = np.moveaxis(a, axis, 0)
+            points, between, t = self._interpolation(axis)
+            fine = np.empty((n,) + a.shape[1:])
+            fine[points] = a
+            # every other point is between two coarse points
+            t = _column(t, a.ndim)
+            fine[between] = (1 - t) * a[between // 2] + t * a[between // 2 + 1]
+            a = np.moveaxis(fine, 0, axis)
+        return a
+
+
+def _index(axis: int, i: int):
+    """index of the array `i` along the `axis` that keeps the dimension"""
+    index = [slice(None)] * 3
+    index[axis] = slice(i, i + 1) if i != -1 else slice(-1, None)
+    return tuple(index)
+
+
+def _column(w: np.ndarray, ndim: int) -> np.ndarray:
+    """1D array to broadcast along the first axis"""
+    return w.reshape((-1,) + (1,) * (ndim - 1))
+
+
+def _colors(shape, free: np.ndarray) -> typing.List[np.ndarray]:
+    """red and black points of the grid"""
+    parity = np.indices(shape).sum(axis=0) % 2
+    return [free & (parity == 0), free & (parity == 1)]
+
+
+def _relax(grid: LaplaceGrid, phi: np.ndarray, colors: typing.List[np.ndarray], omega=1.0,
+           f: typing.Optional[np.ndarray] = None, reverse=False) -> float:
+    """one red-black sweep (black-red if `reverse`). :return: the maximal change of phi"""
+    max_change = 0
+    for color in (colors[::-1] if reverse else colors):
+        change = omega * (grid.jacobi(phi, f)[color] - phi[color])
+        phi[color] += change
+        if change.size:
+            max_change = max(max_change, np.abs(change).max())
+    return max_change
+
+
+def _max_change(grid: LaplaceGrid, phi: np.ndarray, fixed: np.ndarray) -> float:
+    """the maximal change of the potential (V) that one Jacobi sweep would make (the convergence criterion)"""
+    change = np.abs(grid.jacobi(phi) - phi)[~fixed]
+    return change.max() if change.size else 0
+
+
+def solve_sor(grid: LaplaceGrid, phi: np.ndarray, fixed: np.ndarray, settings: SolverSettings,
+              region: typing.Optional[np.ndarray] = None, history: typing.Optional[list] = None) -> int:
+    """
+    solve the Laplace equation with red-black successive over-relaxation.
+    :param grid: the Laplace operator
+    :param phi: the initial potential. It is changed inplace. Fixed points hold their values
+    :param fixed: bool mask of the points with fixed potential (electrodes)
+    :param settings: convergence parameters
+    :param region: bool mask of the points to relax (all non-fixed if None)
+    :param history: the maximal change of each iteration is appended here
+    :return: the number of iterations
+    """
+    free = ~fixed if region is None else region & ~fixed
+    omega = settings.omega
+    if omega is None:
+        n = max(grid.shape)
+        omega = 2 / (1 + np.sin(np.pi / n))
+    colors = _colors(grid.shape, free)
+    for iteration in range(1, settings.max_iterations + 1):
+        max_change = _relax(grid, phi, colors, omega)
+        if history is not None:
+            history.append(max_change)
+        if max_change < settings.convergence:
+            return iteration
+    return settings.max_iterations
+
+
+class _Level:
+    """one grid of the multigrid hierarchy"""
+
+    def __init__(self, grid: LaplaceGrid, fixed: np.ndarray):
+        self.grid = grid
+        self.fixed = fixed
+        self.colors = _colors(grid.shape, ~fixed)
+
+
+def _levels(grid: LaplaceGrid, fixed: np.ndarray, coarsest_size: int) -> typing.List[_Level]:
+    """
+    the multigrid hierarchy. Each axis is coarsened while it has at least `2*coarsest_size-1` points
+    (semi-coarsening), so the coarsest grid of an elongated or axisymmetric array is small along every axis.
+    A coarse point is fixed if any of its fine neighbours is fixed
+    """
+    levels = []
+    while True:
+        # the copy: the coarse axes of the grid of the caller are not changed
+        grid = copy.copy(grid)
+        grid.coarse_axes = tuple(axis for axis, x in grid.positions.items() if len(x) >= 2 * coarsest_size - 1)
+        levels.append(_Level(grid, fixed))
+        if not grid.coarse_axes:
+            return levels
+        fixed = grid.restrict(fixed, how="max")
+        grid = grid.coarse()
+
+
+def _v_cycle(levels: typing.List[_Level], phi: np.ndarray, f: np.ndarray, settings: SolverSettings):
+    """
+    one V-cycle for `diag*phi - neighbour_sum(phi) = f` starting from the first of `levels`.
+    The sweeps after the coarse grid correction go in the reverse order, so the cycle is symmetric
+    """
+    level = levels[0]
+    if len(levels) == 1:
+        omega = 2 / (1 + np.sin(np.pi / max(level.grid.shape)))
+        sweeps = 2 * max(level.grid.shape)
+        for reverse in [False] * sweeps + [True] * sweeps:
+            _relax(level.grid, phi, level.colors, omega, f, reverse)
+        return
+    for _ in range(settings.pre_smoothing):
+        _relax(level.grid, phi, level.colors, f=f)
+    r = level.grid.residual(phi, f)
+    r[level.fixed] = 0
+    coarse_f = level.grid.restrict(r)
+    coarse_f[levels[1].fixed] = 0
+    correction = np.zeros(coarse_f.shape)
+    _v_cycle(levels[1:], correction, coarse_f, settings)
+    free = ~level.fixed
+    phi[free] += level.grid.prolong(correction)[free]
+    for _ in range(settings.post_smoothing):
+        _relax(level.grid, phi, level.colors, f=f, reverse=True)
+
+
+def _full_multigrid_guess(levels: typing.List[_Level], phi: np.ndarray, settings: SolverSettings):
+    """initial guess for the free points of `phi` from the solution on the coarser grids"""
+    if len(levels) == 1:
+        return
+    level, coarse = levels[0], levels[1]
+    # the fixed points appeared on coarse grid get the potential of the fine fixed neighbour
+    coarse_phi = level.grid.restrict(np.where(level.fixed, phi, -np.inf), how="max")
+    injected = level.grid.restrict(phi, how="inject")
+    coarse_phi = np.where(coarse.fixed & np.isfinite(coarse_phi), coarse_phi, injected)
+    _full_multigrid_guess(levels[1:], coarse_phi, settings)
+    _v_cycle(levels[1:], coarse_phi, np.zeros(coarse_phi.shape), settings)
+    free = ~level.fixed
+    phi[free] = level.grid.prolong(coarse_phi)[free]
+
+
+def solve_multigrid(grid: LaplaceGrid, phi: np.ndarray, fixed: np.ndarray, settings: SolverSettings,
+                    history: typing.Optional[list] = None, warm_start=False) -> int:
+    """
+    solve the Laplace equation with geometric multigrid. The electrodes are fixed at every grid level:
+    a coarse point is fixed if it or the fine point between it and the next coarse point is fixed.
+    Thin electrodes make the coarse grid correction inexact, so V-cycles precondition conjugate gradients
+    (in the scalar product weighted by the volumes of the points)
+    :param history: the maximal change of the potential (V) that one more Jacobi sweep would make
+      after each V-cycle is appended here
+    :param warm_start: `phi` is a guess already (e.g. the previous solution).
+      The full multigrid guess replaces it only if it is closer to the solution
+    :return: the number of V-cycles
+    """
+    levels = _levels(grid, fixed, settings.coarsest_size)
+    free = ~fixed
+    if settings.full_multigrid and warm_start:
+        guess = phi.copy()
+        _full_multigrid_guess(levels, guess, settings)
+        if _max_change(grid, guess, fixed) < _max_change(grid, phi, fixed):
+            phi[free] = guess[free]
+    elif settings.full_multigrid:
+        _full_multigrid_guess(levels, phi, settings)
+    zero = np.zeros(grid.shape)
+    r = grid.residual(phi, zero)
+    r[fixed] = 0
+    p = np.zeros(grid.shape)
+    rz = None
+    for cycle in range(1, settings.max_iterations + 1):
+        z = np.zeros(grid.shape)
+        _v_cycle(levels, z, r, settings)
+        rz, rz_old = np.vdot(grid.volume * r, z), rz
+        p = z if rz_old is None else z + rz / rz_old * p
+        q = -grid.residual(p, zero)
+        q[fixed] = 0
+        pq = np.vdot(grid.volume * p, q)
+        alpha = rz / pq if pq else 0
+        phi[free] += alpha * p[free]
+        r -= alpha * q
+        change = np.abs(r / grid.diag)[free]
+        max_change = change.max() if change.size else 0
+        if history is not None:
+            history.append(max_change)
+        if max_change < settings.convergence:
+            return cycle
+    return settings.max_iterations
+
+
+class SparseLaplace:
+    """
+    The Laplace equation for the free points as a sparse matrix with LU factorization.
+    The factorization is made once, so every solution for other potentials of the fixed points
+    (e.g. for each electrode of fast adjustable array) costs only the back substitution
+    """
+
+    def __init__(self, grid: LaplaceGrid, fixed: np.ndarray):
+        from scipy import sparse
+        from scipy.sparse.linalg import splu
+        self.grid = grid
+        self.fixed = fixed
+        free = ~fixed
+        # the number of each point among the free or among the fixed ones
+        number = np.empty(grid.shape, dtype=np.int64)
+        number[free] = np.arange(np.count_nonzero(free))
+        number[fixed] = np.arange(np.count_nonzero(fixed))
+        indexes = [i[free] for i in np.indices(grid.shape)]
+        rows = number[free]
+        diag = np.broadcast_to(grid.diag, grid.shape)[free]
+        a_rows, a_cols, a_values = [rows], [rows], [diag]
+        c_rows, c_cols, c_values = [], [], []
+        for axis, (w_minus, w_plus) in grid.weights.items():
+            n = grid.shape[axis]
+            i = indexes[axis]
+            # the neighbours, reflected on the borders
+            for neighbour, w in ((np.where(i == 0, 1, i - 1), w_minus), (np.where(i == n - 1, n - 2, i + 1), w_plus)):
+                neighbour_index = list(indexes)
+                neighbour_index[axis] = neighbour
+                neighbour_index = tuple(neighbour_index)
+                w = np.broadcast_to(w, grid.shape)[free]
+                is_free = free[neighbour_index]
+                cols = number[neighbour_index]
+                a_rows.append(rows[is_free])
+                a_cols.append(cols[is_free])
+                a_values.append(-w[is_free])
+                c_rows.append(rows[~is_free])
+                c_cols.append(cols[~is_free])
+                c_values.append(w[~is_free])
+        n_free, n_fixed = np.count_nonzero(free), np.count_nonzero(fixed)
+        matrix = sparse.csc_matrix(
+            (np.concatenate(a_values), (np.concatenate(a_rows), np.concatenate(a_cols))), shape=(n_free, n_free)
+        )
+        # the right hand side is the sum of the fixed neighbours with theirs weights
+        self.coupling = sparse.csr_matrix(
+            (np.concatenate(c_values), (np.concatenate(c_rows), np.concatenate(c_cols))), shape=(n_free, n_fixed)
+        )
+        self.lu = splu(matrix)
+
+    def solve(self, phi: np.ndarray, history: typing.Optional[list] = None) -> int:
+        """
+        find the potential of the free points of `phi` (inplace) for the potentials of its fixed points
+        :param history: the maximal change of the potential (V) that one Jacobi sweep would make is appended here
+        :return: the number of iterations (1)
+        """
+        free = ~self.fixed
+        phi[free] = self.lu.solve(self.coupling @ phi[self.fixed])
+        if history is not None:
+            history.append(_max_change(self.grid, phi, self.fixed))
+        return 1
+
+
+def solve(grid: LaplaceGrid, phi: np.ndarray, fixed: np.ndarray, settings: SolverSettings,
+          history: typing.Optional[list] = None, warm_start=False) -> int:
+    """
+    solve the Laplace equation with the method from the settings.
+    :param history: the convergence history (maximal change of the potential per iteration or V-cycle)
+    :param warm_start: `phi` is a guess already (see `solve_multigrid`)
+    :return: the number of iterations
+    """
+    assert settings.method in ("sor", "multigrid", "sparse"), f"unknown solver method {settings.method}"
+    if settings.method == "sparse":
+        return SparseLaplace(grid, fixed).solve(phi, history)
+    if settings.method == "multigrid":
+        return solve_multigrid(grid, phi, fixed, settings, history, warm_start)
+    return solve_sor(grid, phi, fixed, settings, history=history)
+
+
+def _dilate(mask: np.ndarray, margin: int) -> np.ndarray:
+    """grow the mask by `margin` points in every direction"""
+    for axis in range(mask.ndim):
+        for _ in range(margin):
+            m = np.moveaxis(mask, axis, 0)
+            grown = m.copy()
+            grown[1:] |= m[:-1]
+            grown[:-1] |= m[1:]
+            mask = np.moveaxis(grown, 0, axis)
+    return mask
+
+
+def _previous_points(previous: PA, pa: PA) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """the float indexes in `previous` of the points of `pa` (the same physical points, clipped to the borders)"""
+    nx, ny, nz = pa.size()
+    old_nx, old_ny, old_nz = previous.size()
+    zi, yi, xi = np.indices((nz, ny, nx), dtype=float)
+    return (
+        np.clip(xi * pa.dx_mm() / previous.dx_mm(), 0, old_nx - 1),
+        np.clip(yi * pa.dy_mm() / previous.dy_mm(), 0, old_ny - 1),
+        np.clip(zi * pa.dz_mm() / previous.dz_mm(), 0, old_nz - 1),
+    )
+
+
+def _relax_locally(grid: LaplaceGrid, phi: np.ndarray, fixed: np.ndarray, region: np.ndarray,
+                   settings: SolverSettings) -> int:
+    """
+    SOR only in the box around the `region`. The potential on the box faces inside the array is fixed
+    :return: the number of iterations
+    """
+    if not region.any():
+        return 0
+    box = []
+    for axis, indexes in enumerate(np.nonzero(region)):
+        box.append(slice(max(indexes.min() - 1, 0), min(indexes.max() + 2, grid.shape[axis])))
+    box = tuple(box)
+    box_fixed = fixed[box].copy()
+    positions = {}
+    for axis, x in grid.positions.items():
+        positions[axis] = x[box[axis]]
+        # the faces of the box that are not the borders of the array
+        faces = np.moveaxis(box_fixed, axis, 0)
+        if box[axis].start > 0:
+            faces[0] = True
+        if box[axis].stop < grid.shape[axis]:
+            faces[-1] = True
+    box_grid = LaplaceGrid(box_fixed.shape, cylindrical=grid.cylindrical, positions=positions)
+    box_phi = phi[box].copy()
+    iterations = solve_sor(box_grid, box_phi, box_fixed, settings, region=region[box])
+    phi[box] = box_phi
+    return iterations
+
+
+def _save_solution(pa_filename: str, pasharp: PA, phi: np.ndarray, ending: str, with_pasharp=False):
+    """save the solution to `{pa_filename}.pa{ending}` with the electrode points of `pasharp`"""
+    pa = PA(file=f"{pa_filename}.pa#")
+    mask = pasharp.electrode_mask()
+    pa.set_points_from_mask(~mask, phi, is_electrode=0)
+    pa.set_points_from_mask(mask, phi)
+    if with_pasharp:
+        pa.pasharp(pasharp)
+    pa.save(f"{pa_filename}.pa{ending}")
+
+
+def refine_pa(pa_filename: str, settings: typing.Optional[SolverSettings] = None,
+              previous: typing.Optional[str] = None) -> typing.Dict[int, dict]:
+    """
+    refine `{pa_filename}.pa#` like SIMION does for fast adjustable arrays:
+    `.paN` is the solution with the electrode N at 10000 V and the other electrodes at 0 V,
+    `.pa0` has all the electrodes at 0 V (use fast adjust for setting the voltages)
+    :param previous: the name of the refined arrays of a similar trap (e.g. the previous step of a parameter sweep).
+      Its solutions (resampled if the grid differs) are the initial guess. The points around the electrodes
+      that were changed are relaxed first. If the guess is converged after that, the global solution is skipped
+      (0 iterations). The full multigrid guess is used instead of it if it is closer to the solution
+    :return: the number of iterations, the solving time and the convergence history for each electrode.
+      "setup" is the time of the preparation shared by all the electrodes (factorization for "sparse" method),
+      "local_iterations" are the iterations of the relaxation near the changed electrodes
+    """
+    settings = settings if settings else SolverSettings()
+    pasharp = PA(file=f"{pa_filename}.pa#")
+    fixed = pasharp.electrode_mask()
+    types = pasharp.electrode_types()
+    grid = LaplaceGrid(fixed.shape, cylindrical=pasharp.symmetry() == "cylindrical")
+    t0 = time.time()
+    # one factorization for all the electrodes
+    sparse_laplace = SparseLaplace(grid, fixed) if settings.method == "sparse" else None
+    previous_pasharp = PA(file=f"{previous}.pa#", mmap=True) if previous else None
+    if previous_pasharp:
+        points = _previous_points(previous_pasharp, pasharp)
+        nearest = tuple(np.rint(i).astype(int) for i in points[::-1])
+        changed = previous_pasharp.electrode_types()[nearest] != types
+        region = _dilate(changed, settings.warm_start_margin)
+    setup_time = time.time() - t0
+    stats = {}
+    for n in np.unique(types[fixed]):
+        if n not in FAST_ADJUSTABLE_TYPES:
+            continue
+        t0 = time.time()
+        phi = np.where(types == n, FAST_ADJUST_VOLTAGE, 0.0)
+        history = []
+        local_iterations = 0
+        warm_start = previous_pasharp is not None and os.path.exists(f"{previous}.pa{n}") and not sparse_laplace
+        if warm_start:
+            phi[~fixed] = PA(file=f"{previous}.pa{n}", mmap=True).potential_real_many(*points)[~fixed]
+            local_iterations = _relax_locally(grid, phi, fixed, region, settings)
+        if warm_start and _max_change(grid, phi, fixed) < settings.convergence:
+            iterations = 0
+        elif sparse_laplace:
+            iterations = sparse_laplace.solve(phi, history)
+        else:
+            iterations = solve(grid, phi, fixed, settings, history, warm_start)
+        stats[int(n)] = {
+            "iterations": iterations, "local_iterations": local_iterations,
+            "time": time.time() - t0, "setup": setup_time, "residuals": history
+        }
+        _save_solution(pa_filename, pasharp, phi, str(n))
+    _save_solution(pa_filename, pasharp, np.zeros(fixed.shape), "0", with_pasharp=True)
+    return stats
+
+
+def compare_with_reference(filename: str, reference_filename: str) -> typing.Dict[str, float]:
+    """
+    benchmark the solution against the array refined by SIMION (e.g. `test.pa1` and `simion/test.pa1`)
+    :return: the maximal and the root mean square difference of potentials at non-electrode points (V)
+    """
+    pa = PA(file=filename, mmap=True)
+    reference = PA(file=reference_filename, mmap=True)
+    assert pa.size() == reference.size(), "the arrays have different sizes"
+    free = ~reference.electrode_mask()
+    diff = (pa.potentials() - reference.potentials())[free]
+    return {
+        "max": float(np.abs(diff).max()) if diff.size else 0.0,
+        "rms": float(np.sqrt(np.mean(diff ** 2))) if diff.size else 0.0,
+    }
@@ -0,0 +1,145 @@
+"""
+on-disk cache of the generated (.pa#), refined (.pa0, .pa1, ...) and adjusted (.pa0) arrays.
+The entries are named by the hash of everything the arrays depend on, the least recently used are evicted
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import typing
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+
+import numpy as np
+
+import laplace_solver
+from SIMION.PA import PA
+
+CACHE_VERSION = 3  # increase it when the generated arrays change for the same parameters
+DEFAULT_MAX_SIZE = 10 * 1024 ** 3  # bytes
+
+
+def _jsonable(value):
+    """
+    the value in the form for json. Arrays are replaced by theirs digests
+    :raise TypeError: for the values that can not be a part of a key (PA, functions, ...)
+    """
+    if isinstance(value, Enum):
+        return f"{value.__class__.__name__}.{value.name}"
+    if isinstance(value, (bool, int, float, str)) or value is None:
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        digest = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return {"dtype": value.dtype.str, "shape": list(value.shape), "sha256": digest}
+    if is_dataclass(value) and not isinstance(value, type):
+        value = asdict(value)
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_jsonable(v) for v in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    raise TypeError(f"{value.__class__.__name__} can not be a part of the cache key: {value!r:.100}")
+
+
+def make_key(*parts) -> str:
+    """stable hash of the parts (numbers, strings, arrays, dataclasses, dicts and lists of them)"""
+    dump = json.dumps([CACHE_VERSION, *[_jsonable(part) for part in parts]], sort_keys=True)
+    return hashlib.sha256(dump.encode()).hexdigest()
+
+
+class PACache:
+    """
+    directory with one subdirectory per entry. An entry contains the files `pa#`, `pa0`, `pa1`, ...
+    The modification time of the entry is the time of the last use
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        :param directory: where to store the arrays
+        :param max_size: the size limit of all the entries (bytes)
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str, pa_filename: str) -> bool:
+        """
+        copy the arrays of the entry to `{pa_filename}.paN`
+        :return: whether the entry was found
+        """
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            return False
+        for path in glob.glob(os.path.join(entry, "pa*")):
+            shutil.copyfile(path, f"{pa_filename}.{os.path.basename(path)}")
+        os.utime(entry)
+        return True
+
+    def store(self, key: str, pa_filename: str, endings: typing.Iterable[str]):
+        """put `{pa_filename}.pa{ending}` to the entry and evict the old entries if the cache is too large"""
+        entry = self._entry(key)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        os.makedirs(tmp, exist_ok=True)
+        for ending in endings:
+            shutil.copyfile(f"{pa_filename}.pa{ending}", os.path.join(tmp, f"pa{ending}"))
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(tmp, entry)
+        self.evict(keep=key)
+
+    def size(self) -> int:
+        """the size of all the entries (bytes)"""
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self) -> typing.List[typing.Tuple[float, str, int]]:
+        """(the time of the last use, path, size) of each entry"""
+        entries = []
+        for entry in glob.glob(os.path.join(self.directory, "*")):
+            if not os.path.isdir(entry) or entry.endswith(".tmp"):
+                continue
+            size = sum(os.path.getsize(path) for path in glob.glob(os.path.join(entry, "pa*")))
+            entries.append((os.path.getmtime(entry), entry, size))
+        return entries
+
+    def evict(self, keep: typing.Optional[str] = None):
+        """
+        remove the least recently used entries until the cache fits into `max_size`
+        :param keep: the key of the entry that is never removed (the one just stored)
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, entry, size in entries:
+            if total <= self.max_size:
+                break
+            if keep is not None and entry == self._entry(keep):
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """remove all the entries"""
+        for _, entry, _ in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def refined_endings(pa_filename: str) -> typing.List[str]:
+    """the endings of the files created by refine of `{pa_filename}.pa#`: 0 and the fast adjustable electrodes"""
+    pasharp = PA(file=f"{pa_filename}.pa#", mmap=True)
+    types = np.unique(pasharp.electrode_types()[pasharp.electrode_mask()])
+    return ["0"] + [str(n) for n in types if n in laplace_solver.FAST_ADJUSTABLE_TYPES]
+
+
+def files_digest(pa_filename: str, endings: typing.Iterable[str]) -> str:
+    """the hash of the contents of the files `{pa_filename}.pa{ending}` (e.g. the previous arrays of refine)"""
+    digest = hashlib.sha256()
+    for ending in endings:
+        digest.update(f"pa{ending}".encode())
+        with open(f"{pa_filename}.pa{ending}", "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
@@ -21,12 +21,12 @@ def create_temp_traps(trap: AbstractTrap, trap_params: Optional[TrapVisParams] =
     """
     creates expand trap for better visualization
     """
-    trap.pa = PA(file=f"{trap.pa_filename}.pa#")
+    trap.pa = PA(file=f"{trap.pa_filename}.pa#", mmap=True)
     expand_range = None
     if trap_params:
         expand_range = trap_params.expand_amount
     expand_trap(trap, expand_range)
-    trap.pa = PA(file=f"{trap.pa_filename}_expanded.pa#")
+    trap.pa = PA(file=f"{trap.pa_filename}_expanded.pa#", mmap=True)
     # leave_surface_only(trap)
     # trap.pa = PA(file=f"{trap.pa_file_name}_surface.pa#")
     return trap
@@ -70,7 +70,7 @@ def _get_coords_and_types(trap: abstract_trap.AbstractTrap):
     electrodes, e_types = get_all_electrodes(trap, without_symmetry=False)
     coords = []
     for electrode in electrodes:
-        coords.append(np.array(list(electrode)) * trap.gridstepmm)
+        coords.append(electrode * trap.gridstepmm)
     for i in range(len(e_types)):
         e_types[i] = int(e_types[i])
     return coords, e_types
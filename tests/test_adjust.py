@@ -0,0 +1,27 @@
+import numpy as np
+
+import laplace_solver
+from SIMION.PA import PA
+from traps import cylindrical_trap
+
+
+def test_numpy_adjust_keeps_the_not_fast_adjustable_electrodes(tmp_path):
+    trap = cylindrical_trap.CylindricalTrap(a=20e-3, z0=20e-3, pts=20, pa_file_name=str(tmp_path / "trap"))
+    n = 9
+    pa = PA(symmetry="planar", max_voltage=100000, nx=n, ny=n, nz=n, mirror="xyz", field_type="electrostatic",
+            ng=100, dx_mm=1, dy_mm=1, dz_mm=1, fast_adjustable=0, enable_points=1)
+    z, y, x = np.indices((n, n, n))
+    fast = (x == n - 1) | (y == n - 1)
+    fixed = (z == n - 1) & ~fast
+    pa.set_points_from_mask(fast | fixed, np.where(fast, 1.0, 31.0))
+    pa.save(f"{trap.pa_filename}.pa#")
+    laplace_solver.refine_pa(trap.pa_filename, laplace_solver.SolverSettings(method="sparse"))
+    # the potential of the electrode 31 is set in .pa0, it is not a fast adjustable one
+    pa0 = PA(file=f"{trap.pa_filename}.pa0")
+    pa0.set_points_from_mask(fixed, np.full(fixed.shape, 7.0))
+    pa0.save(f"{trap.pa_filename}.pa0")
+
+    trap._adjust_trap_numpy({1: 100.0})
+    potentials = PA(file=f"{trap.pa_filename}.pa0").potentials()
+    assert np.allclose(potentials[fixed], 7.0)
+    assert np.allclose(potentials[fast], 100.0)
@@ -0,0 +1,62 @@
+import numpy as np
+
+import laplace_solver
+from SIMION.PA import PA
+
+SETTINGS = laplace_solver.SolverSettings(method="multigrid", convergence=1e-3)
+
+
+def _pasharp(filename, inner_size, n=17):
+    """the box with the far walls (electrode 1) and the cube in the corner of the mirror planes (electrode 2)"""
+    pa = PA(symmetry="planar", max_voltage=100000, nx=n, ny=n, nz=n, mirror="xyz", field_type="electrostatic",
+            ng=100, dx_mm=1, dy_mm=1, dz_mm=1, fast_adjustable=0, enable_points=1)
+    z, y, x = np.indices((n, n, n))
+    walls = (x == n - 1) | (y == n - 1) | (z == n - 1)
+    inner = (x < inner_size) & (y < inner_size) & (z < inner_size)
+    pa.set_points_from_mask(walls | inner, np.where(inner, 2.0, 1.0))
+    pa.save(f"{filename}.pa#")
+
+
+def _potentials(filename, n):
+    return PA(file=f"{filename}.pa{n}").potentials()
+
+
+def test_warm_start_from_the_same_geometry_skips_the_solution(tmp_path):
+    previous, current = str(tmp_path / "previous"), str(tmp_path / "current")
+    _pasharp(previous, 4)
+    _pasharp(current, 4)
+    laplace_solver.refine_pa(previous, SETTINGS)
+    stats = laplace_solver.refine_pa(current, SETTINGS, previous)
+    assert all(electrode["iterations"] == 0 for electrode in stats.values())
+    for n in stats:
+        assert np.array_equal(_potentials(current, n), _potentials(previous, n))
+
+
+def test_warm_start_from_the_changed_geometry(tmp_path):
+    previous, current, cold = str(tmp_path / "previous"), str(tmp_path / "current"), str(tmp_path / "cold")
+    _pasharp(previous, 4)
+    _pasharp(current, 5)
+    _pasharp(cold, 5)
+    laplace_solver.refine_pa(previous, SETTINGS)
+    cold_stats = laplace_solver.refine_pa(cold, SETTINGS)
+    warm_stats = laplace_solver.refine_pa(current, SETTINGS, previous)
+    for n in cold_stats:
+        # the full multigrid guess is kept if the previous solution is worse, so it is never slower
+        assert warm_stats[n]["iterations"] <= cold_stats[n]["iterations"]
+        assert np.abs(_potentials(current, n) - _potentials(cold, n)).max() < 1
+
+
+def test_elongated_grid_is_coarsened_along_every_axis():
+    shape = (1, 17, 257)
+    z, y, x = np.indices(shape)
+    inner = (x > 80) & (x < 84) & (y < 8)
+    fixed = (x == shape[2] - 1) | (y == shape[1] - 1) | inner
+    grid = laplace_solver.LaplaceGrid(shape, cylindrical=True)
+    levels = laplace_solver._levels(grid, fixed, SETTINGS.coarsest_size)
+    assert max(levels[-1].grid.shape) < 2 * SETTINGS.coarsest_size - 1
+    assert grid.coarse_axes is None
+    phi = np.where(inner, 10000.0, 0.0)
+    laplace_solver.solve_multigrid(grid, phi, fixed, SETTINGS)
+    exact = np.where(inner, 10000.0, 0.0)
+    laplace_solver.SparseLaplace(grid, fixed).solve(exact)
+    assert np.abs(phi - exact).max() < 0.1
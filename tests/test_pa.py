@@ -0,0 +1,24 @@
+import numpy as np
+
+from SIMION.PA import PA
+
+
+def _pa(mirror):
+    pa = PA(symmetry="planar", max_voltage=100000, nx=6, ny=5, nz=4, mirror=mirror, field_type="electrostatic",
+            ng=100, dx_mm=1, dy_mm=1, dz_mm=1, fast_adjustable=0, enable_points=1)
+    z, y, x = np.indices((4, 5, 6))
+    pa.set_points_from_mask(np.ones((4, 5, 6), dtype=bool), (x + 1.0) ** 2 + y * z, is_electrode=0)
+    return pa
+
+
+def test_field_grid_follows_the_mirror():
+    pa = _pa("xyz")
+    mirrored = [component.copy() for component in pa.field_grid()]
+    pa.mirror("")
+    field = pa.field_grid()
+    # the mirror planes change the field on the borders x=0, y=0, z=0
+    assert not np.allclose(field[0], mirrored[0])
+    for component, expected in zip(field, _pa("").field_grid()):
+        assert np.array_equal(component, expected)
+    pa.mirror_x(1)
+    assert np.array_equal(pa.field_grid()[0], _pa("x").field_grid()[0])
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pytest
+
+import pa_cache
+from traps import cylindrical_trap
+
+
+def _trap(tmp_path, a=20e-3):
+    return cylindrical_trap.CylindricalTrap(a=a, z0=20e-3, pts=20, pa_file_name=str(tmp_path / "trap"))
+
+
+def test_unknown_types_are_not_silently_dropped():
+    with pytest.raises(TypeError):
+        pa_cache.make_key({"callback": lambda x: x})
+    with pytest.raises(TypeError):
+        pa_cache.make_key([object()])
+
+
+def test_arrays_are_part_of_the_key():
+    assert pa_cache.make_key({"x": np.zeros(3)}) != pa_cache.make_key({"x": np.ones(3)})
+    assert pa_cache.make_key({"x": np.zeros(3)}) != pa_cache.make_key({"x": np.zeros((3, 1))})
+    assert pa_cache.make_key({"x": np.zeros(3)}) == pa_cache.make_key({"x": np.zeros(3)})
+
+
+def test_traps_of_different_sizes_have_different_keys(tmp_path):
+    first, second = _trap(tmp_path), _trap(tmp_path, a=25e-3)
+    assert pa_cache.make_key("generate", first._cache_params()) == \
+        pa_cache.make_key("generate", _trap(tmp_path)._cache_params())
+    assert pa_cache.make_key("generate", first._cache_params()) != \
+        pa_cache.make_key("generate", second._cache_params())
+
+
+def test_files_digest_depends_on_the_contents(tmp_path):
+    name = str(tmp_path / "previous")
+    with open(f"{name}.pa#", "wb") as file:
+        file.write(b"first")
+    first = pa_cache.files_digest(name, ["#"])
+    with open(f"{name}.pa#", "wb") as file:
+        file.write(b"second")
+    assert pa_cache.files_digest(name, ["#"]) != first
+
+
+def _store(cache, key, name, size):
+    with open(f"{name}.pa#", "wb") as file:
+        file.write(b"0" * size)
+    cache.store(key, name, ["#"])
+
+
+def test_eviction_removes_the_oldest_entries(tmp_path):
+    cache = pa_cache.PACache(str(tmp_path / "cache"), max_size=250)
+    name = str(tmp_path / "trap")
+    for number, key in enumerate(["a", "b", "c"]):
+        _store(cache, key, name, 100)
+        os.utime(os.path.join(cache.directory, key), (number, number))
+    assert not cache.load("a", name)
+    assert cache.load("b", name) and cache.load("c", name)
+    assert cache.size() <= cache.max_size
+
+
+def test_eviction_keeps_the_stored_entry(tmp_path):
+    cache = pa_cache.PACache(str(tmp_path / "cache"), max_size=50)
+    name = str(tmp_path / "trap")
+    _store(cache, "old", name, 10)
+    # the new entry is larger than the whole cache and its time can be older than the others
+    _store(cache, "new", name, 100)
+    assert cache.load("new", name)
+    assert not cache.load("old", name)
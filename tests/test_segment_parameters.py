@@ -0,0 +1,32 @@
+import numpy as np
+
+import pa_cache
+from traps import brustkern_trap, open_compensated, tolmachov_trap, trapping_ring
+
+
+def _types(trap, coords):
+    return np.asarray(trap.get_electrode_type(coords))
+
+
+def test_changed_parameter_changes_the_geometry(tmp_path):
+    changed = open_compensated.OpenCompensatedCylindricalTrap(
+        z0=20e-3, a=20e-3, dzc=8e-3, ze=80e-3, pts=20, pa_file_name=str(tmp_path / "changed"))
+    key = pa_cache.make_key("generate", changed._cache_params())
+    changed.dzc = 12e-3
+    fresh = open_compensated.OpenCompensatedCylindricalTrap(
+        z0=20e-3, a=20e-3, dzc=12e-3, ze=80e-3, pts=20, pa_file_name=str(tmp_path / "fresh"))
+    z = np.linspace(0, 20e-3, 200)
+    coords = (np.full_like(z, 20e-3), np.full_like(z, 1.0), z)
+    assert np.array_equal(_types(changed, coords), _types(fresh, coords))
+    assert pa_cache.make_key("generate", changed._cache_params()) != key
+
+
+def test_tables_follow_the_attributes(tmp_path):
+    tolmachov = tolmachov_trap.TolmachovTrap(a=20e-3, pts=20, pa_file_name=str(tmp_path / "tolmachov"))
+    brustkern = brustkern_trap.BrustkernTrap(a=20e-3, pts=20, pa_file_name=str(tmp_path / "brustkern"))
+    ring = trapping_ring.TrappingRingTrap(a=20e-3, pts=20, pa_file_name=str(tmp_path / "ring"))
+    for trap, table, attribute in ((tolmachov, "_electrodes", "zc1"), (brustkern, "_gaps", "gap_size"),
+                                   (brustkern, "_electrodes", "zc2"), (ring, "_rings", "ring_width")):
+        borders = getattr(trap, table).borders.copy()
+        setattr(trap, attribute, getattr(trap, attribute) * 1.5)
+        assert not np.array_equal(getattr(trap, table).borders, borders), (trap.name, attribute)
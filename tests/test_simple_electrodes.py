@@ -0,0 +1,26 @@
+import numpy as np
+
+from traps import cylindrical_trap, wang_trap
+
+
+def _points(trap, number=2000):
+    rng = np.random.default_rng(0)
+    border = trap.model_border
+    if trap.cylindrical_geometry:
+        return rng.uniform(0, border.x, number), rng.uniform(-np.pi, np.pi, number), rng.uniform(0, border.z, number)
+    return rng.uniform(0, border.x, number), rng.uniform(0, border.y, number), rng.uniform(0, border.z, number)
+
+
+def test_shared_cut_is_the_same_as_the_predicates(tmp_path):
+    for trap in (cylindrical_trap.CylindricalTrap(a=20e-3, z0=20e-3, pts=20, pa_file_name=str(tmp_path / "cyl")),
+                 wang_trap.WangTrap(z0=20e-3, a=20e-3, delta_c=1e-3, wire_num=5, pts=20,
+                                    pa_file_name=str(tmp_path / "wang"))):
+        coords = _points(trap)
+        endcap, other = trap._endcap_and_other_electrodes(coords)
+        assert np.array_equal(endcap, trap.is_endcap_electrode(coords))
+        assert np.array_equal(other, trap.is_other_electrode(coords))
+        # the scalar calls are independent of the previous array calls
+        for point in list(zip(*coords))[:50]:
+            index = coords[0] == point[0]
+            assert trap.is_endcap_electrode(point) == endcap[index][0]
+            assert trap.is_other_electrode(point) == other[index][0]
@@ -0,0 +1,23 @@
+import pickle
+
+import pytest
+
+from traps.voltage_enums import gen_voltage_enum
+
+
+@pytest.mark.parametrize("make", [
+    lambda: gen_voltage_enum(1, 0),
+    lambda: gen_voltage_enum(1),
+    lambda: gen_voltage_enum(num_of_compensated=1),
+    lambda: gen_voltage_enum(num_of_trapped=0, num_of_compensated=1),
+])
+def test_members_of_any_calling_style_are_pickled(make):
+    voltages = make()
+    assert voltages is gen_voltage_enum(1, 0)
+    member = voltages.COMPENSATED
+    assert pickle.loads(pickle.dumps(member)) is member
+
+
+def test_default_arguments():
+    assert gen_voltage_enum() is gen_voltage_enum(0, 0)
+    assert pickle.loads(pickle.dumps(gen_voltage_enum().EXCITATION)) is gen_voltage_enum(0, 0).EXCITATION
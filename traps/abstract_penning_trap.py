@@ -1,6 +1,7 @@
 from .abstract_trap import AbstractTrap, CoordsVar
 from abc import ABCMeta, abstractmethod
-from .voltage_enums import TrappedVoltages, Voltages
+from .voltage_enums import TrappedVoltages, Voltages, select_voltage
+from .sectors import EXCITATION_SECTOR, select_sector
 import numpy as np
 import typing
 
@@ -10,6 +11,7 @@ class AbstractPenningTrap(AbstractTrap, metaclass=ABCMeta):
     class for penning traps - with trapped electrode, detection and excitation electrodes...
     """
     _voltages = TrappedVoltages
+    array_predicates = True
 
     def get_endcap_electrode_type(self, coords: CoordsVar) -> Voltages:
         """type of trap electrode. Can depends on coordinates"""
@@ -18,9 +20,7 @@ class AbstractPenningTrap(AbstractTrap, metaclass=ABCMeta):
     def calculate_nontrap_electrode_type(self, coords: CoordsVar) -> Voltages:
         """non trap electrode type. Standard is equal 2 excitation and 2 detection electrodes"""
         r, theta, z = coords
-        if 0 <= theta <= np.pi/4:
-            return TrappedVoltages.EXCITATION
-        return TrappedVoltages.DETECTION
+        return select_sector(theta, [EXCITATION_SECTOR], [TrappedVoltages.EXCITATION], TrappedVoltages.DETECTION)
 
     @abstractmethod
     def is_endcap_electrode(self, coords: CoordsVar) -> bool:
@@ -32,25 +32,39 @@ class AbstractPenningTrap(AbstractTrap, metaclass=ABCMeta):
         """checked if it is a other electrode (it can be also trapped ones, but it is better to separate them"""
         pass
 
+    def _endcap_and_other_electrodes(self, coords: CoordsVar):
+        """`is_endcap_electrode` and `is_other_electrode` of the same points (they can share the calculations)"""
+        return self.is_endcap_electrode(coords), self.is_other_electrode(coords)
+
     def is_electrode(self, coords: CoordsVar) -> bool:
         """check if it is an electrode"""
-        return self.is_endcap_electrode(coords) or self.is_other_electrode(coords)
+        return np.logical_or(*self._endcap_and_other_electrodes(coords))
 
     def get_electrode_type(self, coords: CoordsVar) -> int:
         """provide an electrode integer type"""
-        if self.is_endcap_electrode(coords):
-            e_type = self.get_endcap_electrode_type(coords)
-        else:
-            e_type = self.calculate_nontrap_electrode_type(coords)
-        return e_type.value
+        e_type = select_voltage([self.is_endcap_electrode(coords)], [self.get_endcap_electrode_type(coords)],
+                                self.calculate_nontrap_electrode_type(coords))
+        return getattr(e_type, "value", e_type)
 
     def put_point(self, indexes, coords):
         """put point inside the PA file on coordinate"""
-        i, j, k = indexes
         if self.is_endcap_electrode(coords):
             e_type = self.get_endcap_electrode_type(coords)
-            self.unrefined_pa.point(i, j, k, 1, e_type.value)
+            self._put_electrode(indexes, e_type.value)
         elif self.is_other_electrode(coords):
             e_type = self.calculate_nontrap_electrode_type(coords)
-            self.unrefined_pa.point(i, j, k, 1, e_type.value)
+            self._put_electrode(indexes, e_type.value)
+
+    def put_points(self, indexes, coords):
+        """put points of the arrays. The types are calculated only for the electrode points"""
+        shape = indexes[0].shape
+        endcap, other = self._endcap_and_other_electrodes(coords)
+        endcap = np.broadcast_to(endcap, shape)
+        other = np.broadcast_to(other, shape) & ~endcap
+        for electrode, get_type in ((endcap, self.get_endcap_electrode_type),
+                                    (other, self.calculate_nontrap_electrode_type)):
+            if not electrode.any():
+                continue
+            e_type = get_type(tuple(c[electrode] for c in coords))
+            self._put_electrode(tuple(index[electrode] for index in indexes), getattr(e_type, "value", e_type))
 
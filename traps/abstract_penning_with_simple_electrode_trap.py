@@ -3,6 +3,7 @@ from .abstract_penning_trap import AbstractPenningTrap
 from abc import ABCMeta, abstractmethod
 import typing
 from .voltage_enums import TrappedVoltages, Voltages
+import numpy as np
 
 
 class AbstractPenningTrapWithSimpleElectrodes(AbstractPenningTrap, metaclass=ABCMeta):
@@ -34,8 +35,12 @@ class AbstractPenningTrapWithSimpleElectrodes(AbstractPenningTrap, metaclass=ABC
                               V                                V
       .................|-------------  -> .................|-------------
     and new point will still be an electrode in simple condition, than in new one it will not be an electrode.
+
+    The simple conditions get either scalar coordinates or the arrays of them, so write them with `&`, `|`
+    and `np.logical_not` instead of `and`, `or`, `not` and `if`.
     """
-    
+    array_predicates = True
+
     def __init__(self, trap_border: Coords[float], pa_file_name="test", *,
             pts=150, model_border: typing.Optional[Coords[float]] =None,
             cylindrical_geometry=False, electrode_width=1.6):
@@ -59,20 +64,21 @@ class AbstractPenningTrapWithSimpleElectrodes(AbstractPenningTrap, metaclass=ABC
         # we use "direction" to work both with catesian and cylindrical
         directions = list(directions)
         # check in all directions -- for 1D, 2D or 3D
+        # (not `-=`: it would change the arrays of coordinates in-place)
         for i, direction in enumerate(directions):
             new_coords = list(coords)
-            new_coords[direction] -= width
+            new_coords[direction] = new_coords[direction] - width
             yield tuple(new_coords)
             for j in range(i+1, len(directions)):
                 new_coords = list(coords)
-                new_coords[direction] -= width
-                new_coords[directions[j]] -= width
+                new_coords[direction] = new_coords[direction] - width
+                new_coords[directions[j]] = new_coords[directions[j]] - width
                 yield tuple(new_coords)
                 for k in range(j+1, len(directions)):
                     new_coords = list(coords)
-                    new_coords[direction] -= width
-                    new_coords[directions[j]] -= width
-                    new_coords[directions[k]] -= width
+                    new_coords[direction] = new_coords[direction] - width
+                    new_coords[directions[j]] = new_coords[directions[j]] - width
+                    new_coords[directions[k]] = new_coords[directions[k]] - width
                     yield tuple(new_coords)
 
     def _in_cut_electrode(self, coords: CoordsVar, simple_condition: typing.Callable[[CoordsVar], bool],
@@ -85,8 +91,10 @@ class AbstractPenningTrapWithSimpleElectrodes(AbstractPenningTrap, metaclass=ABC
         :param directions: in which direction the electrode need to be cutted
            (for example the electrode of simple condition z >= 1 need to be leaded to 1 + delta >= z >= 1.
 
-        :return: -1 for inside the trap, 0 for electrode, +1 for outside the trap
+        :return: -1 for inside the trap, 0 for electrode, +1 for outside the trap (the array of them for arrays)
         """
+        if isinstance(coords[0], np.ndarray):
+            return self._in_cut_electrode_arrays(coords, simple_condition, directions)
         if not simple_condition(coords):
             # for example not `z >= z_0` means it is inside the trap
             return -1
@@ -107,6 +115,29 @@ class AbstractPenningTrapWithSimpleElectrodes(AbstractPenningTrap, metaclass=ABC
         # we are far away from border. it is not an electrode any more
         return 1
 
+    def _in_cut_electrode_arrays(self, coords: CoordsVar, simple_condition: typing.Callable[[CoordsVar], bool],
+                                 directions: typing.Optional[typing.Set]=None) -> np.ndarray:
+        """
+        `_in_cut_electrode` for the arrays of coordinates. The test coordinates are checked only for the points
+        that are not inside and were not found near border by the previous test coordinates
+        """
+        coords = np.broadcast_arrays(*coords)
+        inside = np.broadcast_to(np.logical_not(simple_condition(coords)), coords[0].shape)
+        if directions is None:
+            directions = self._standard_direction
+        candidates = np.flatnonzero(~inside)
+        far_from_border = np.ones(candidates.size, dtype=bool)
+        for test_coords in self._gen_coords_for_test(tuple(c.ravel()[candidates] for c in coords), directions,
+                                                     width=self.electrode_width):
+            left = np.flatnonzero(far_from_border)
+            if not left.size:
+                break
+            near_border = np.logical_not(simple_condition(tuple(c[left] for c in test_coords)))
+            far_from_border[left[np.broadcast_to(near_border, left.shape)]] = False
+        cut = np.where(inside, -1, 1)
+        cut.flat[candidates[~far_from_border]] = 0
+        return cut
+
     @abstractmethod
     def _is_endcap_electrode_simple(self, coords: CoordsVar):
         """simple condidion for inner endcap electrode surface"""
@@ -131,23 +162,37 @@ class AbstractPenningTrapWithSimpleElectrodes(AbstractPenningTrap, metaclass=ABC
             directions = {0, 1}
         return self._in_cut_electrode(coords, self._is_other_electrode_simple, directions)
 
+    def _cut_electrodes(self, coords) -> typing.Tuple[typing.Any, typing.Any]:
+        """the cut endcap and other electrodes (see `_in_cut_electrode`), both predicates are made of them"""
+        return self._in_electrode_endcap(coords), self._in_other_electrode(coords)
+
+    @staticmethod
+    def _endcap_of_cut(endcap, other) -> bool:
+        """if in encap and inside the trap"""
+        return (endcap == 0) & (other <= 0)
+
+    @staticmethod
+    def _other_of_cut(endcap, other) -> bool:
+        """if in other electrode and inside the trap"""
+        return (other == 0) & (endcap <= 0)
+
     def is_endcap_electrode(self, coords: CoordsVar) -> bool:
         """is it endcap electrode"""
-        if self._in_electrode_endcap(coords) == 0:
-            # if in encap
-            if self._in_other_electrode(coords) <= 0:
-                # and inside the trap
-                return True
-        return False
+        return self._endcap_of_cut(*self._cut_electrodes(coords))
 
     def is_other_electrode(self, coords: CoordsVar) -> bool:
         """is other electrode"""
-        if self._in_other_electrode(coords) == 0:
-            # if in other electrode
-            if self._in_electrode_endcap(coords) <= 0:
-                # and inside the trap
-                return True
-        return False
+        return self._other_of_cut(*self._cut_electrodes(coords))
+
+    def _endcap_and_other_electrodes(self, coords: CoordsVar):
+        """both predicates of the same points: the electrodes are cut once"""
+        cls = AbstractPenningTrapWithSimpleElectrodes
+        if type(self).is_endcap_electrode is not cls.is_endcap_electrode \
+                or type(self).is_other_electrode is not cls.is_other_electrode:
+            # the subclass defines the predicates itself
+            return super(AbstractPenningTrapWithSimpleElectrodes, self)._endcap_and_other_electrodes(coords)
+        cut = self._cut_electrodes(coords)
+        return self._endcap_of_cut(*cut), self._other_of_cut(*cut)
 
     # def show_this_pot(self, coords: CoordsVar):
     #     return self._in_other_electrode(coords) <= 0 and self._in_electrode_endcap(coords) <= 0
@@ -4,9 +4,13 @@ It creates needed PA file, and works with it
 :auther: Anton Lioznov anton.lioznov@skoltech.ru
 """
 
+import copy
+import functools
 import os
 import subprocess
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 from dataclasses import dataclass
 import typing
 import numpy as np
@@ -16,6 +20,8 @@ import matplotlib.pyplot as plt
 from mpl_toolkits.mplot3d import Axes3D
 from .voltage_enums import Voltages
 from SIMION.PA import PA
+import laplace_solver
+import pa_cache
 from enum import Enum, auto
 T = typing.TypeVar('T')
 AVERAGED_AREA_LENGTH = 10 * 10 ** -3
@@ -43,7 +49,21 @@ class AbstractTrap(metaclass=ABCMeta):
     """
 
     name = "abstract"  # the name of the trap (for file naming)
+    # the predicates defined in this class accept the arrays of coordinates. Each subclass has to declare it itself,
+    # otherwise `generate_trap` falls back to calling them point by point (see `_supports_arrays`)
+    array_predicates = True
     _voltages = Voltages  # the voltages enum for creating fast-adjust after refining
+    has_axisymmetric_model = False  # can the trap be modelled in 2D with cylindrical symmetry
+    axisymmetric = False  # is the 2D model used (see `use_axisymmetric_model`)
+    # electrode points collected by `generate_trap` before they are written to pa at once
+    _generated_mask: typing.Optional[np.ndarray] = None
+    _generated_types: typing.Optional[np.ndarray] = None
+    cache: typing.Optional[pa_cache.PACache] = None  # the cache of the arrays (see `use_cache`)
+    _refine_key: typing.Optional[str] = None  # the cache key of the last refine
+    # the attributes that are not the parameters of the trap: the arrays and the grids calculated from the parameters.
+    # The rest of the public attributes (the borders included) are the cache key of the generated array
+    _derived_attributes = ("pa", "unrefined_pa", "pa_filename", "cache", "refine_stats",
+                           "grid", "rs", "thetas", "averaging_directions")
 
     def _create_geometry(
             self, trap_border: Coords[float],
@@ -89,19 +109,34 @@ class AbstractTrap(metaclass=ABCMeta):
             y=np.linspace(0, self.model_border.y, self.model_lenghts.y),
             z=np.linspace(0, self.model_border.z, self.model_lenghts.z)
         )
-        self.avar_grid = (
-            np.linspace(0, self.model_border.x, self.model_lenghts.x),
-            np.linspace(0, self.model_border.z, self.model_lenghts.z)
-        )
-        self.thetas = None
-        self.rs = None
-        if cylindrical_geometry:
-            self.thetas = np.empty((self.model_lenghts.x, self.model_lenghts.y))
-            self.rs = np.empty((self.model_lenghts.x, self.model_lenghts.y))
-            for j in range(self.model_lenghts.y):
-                for i in range(self.model_lenghts.x):
-                    self.thetas[j, i] = np.arctan2(self.grid.y[j], self.grid.x[i])
-                    self.rs[j, i] = np.sqrt(self.grid.y[j]**2 + self.grid.x[i]**2)
+        # the tables of the previous grid are calculated again when needed
+        for name in ("rs", "thetas", "averaging_directions"):
+            self.__dict__.pop(name, None)
+
+    @property
+    def avar_grid(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """the r and z points of the averaged potential (the same arrays as `grid.x` and `grid.z`)"""
+        return self.grid.x, self.grid.z
+
+    @functools.cached_property
+    def rs(self) -> typing.Optional[np.ndarray]:
+        """the radius of the point (grid.x[i], grid.y[j]) at [i, j] (None if the geometry is not cylindrical)"""
+        if not self.cylindrical_geometry:
+            return None
+        return np.sqrt(self.grid.y[np.newaxis, :]**2 + self.grid.x[:, np.newaxis]**2)
+
+    @functools.cached_property
+    def thetas(self) -> typing.Optional[np.ndarray]:
+        """the angle of the point (grid.x[i], grid.y[j]) at [i, j] (None if the geometry is not cylindrical)"""
+        if not self.cylindrical_geometry:
+            return None
+        return np.arctan2(self.grid.y[np.newaxis, :], self.grid.x[:, np.newaxis])
+
+    @functools.cached_property
+    def averaging_directions(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """cos and sin of the pts*pi/2 angles from 0 to pi/2 the potential is averaged over"""
+        thetas = np.linspace(0, np.pi / 2, int(self.pts * np.pi / 2))
+        return np.cos(thetas), np.sin(thetas)
 
     def get_d(self, r0=None, z0=None):
         """The characteristic size of trap"""
@@ -114,14 +149,20 @@ class AbstractTrap(metaclass=ABCMeta):
         Creates empty PA file using the geometry params, that was calculated
         :return:
         """
+        symmetry, mirror = 'planar', 'xyz'
+        nx, ny, nz = self.model_lenghts.x, self.model_lenghts.y, self.model_lenghts.z
+        if self.axisymmetric:
+            # x of PA is the axis of the trap, y is the radius
+            symmetry, mirror = 'cylindrical', 'xy'
+            nx, ny, nz = self.model_lenghts.z, self.model_lenghts.x, 1
         return PA(
-            symmetry='planar',  # symmetry type: 'planar' or 'cylindrical'
+            symmetry=symmetry,  # symmetry type: 'planar' or 'cylindrical'
             max_voltage=100000,  # this affects the interpretation
             #   of point values
-            nx=self.model_lenghts.x,  # x dimension in grid units
-            ny=self.model_lenghts.y,  # y dimension in grid units
-            nz=self.model_lenghts.z,  # z dimension in grid units
-            mirror='xyz',  # mirroring (subset of "xyz")
+            nx=nx,  # x dimension in grid units
+            ny=ny,  # y dimension in grid units
+            nz=nz,  # z dimension in grid units
+            mirror=mirror,  # mirroring (subset of "xyz")
             field_type='electrostatic',  # field type: 'electrostatic' or 'magnetic'
             ng=100,  # ng scaling factor for magnetic arrays.
             # The following three fields are only supported in SIMION 8.1
@@ -137,7 +178,6 @@ class AbstractTrap(metaclass=ABCMeta):
             pts=150, model_border: typing.Optional[Coords[float]] =None,
             cylindrical_geometry=False
     ):
-        assert os.path.exists(SIMION_LOCATION), f"You need to use SIMION for refine trap. Put it in {SIMION_LOCATION}"
         self.pa_filename = pa_file_name
         self.cylindrical_geometry = cylindrical_geometry
         self._create_geometry(trap_border,
@@ -145,6 +185,38 @@ class AbstractTrap(metaclass=ABCMeta):
         self.unrefined_pa = self.create_dump_pa()
         self.pa = self.unrefined_pa
 
+    def use_axisymmetric_model(self):
+        """
+        use the reduced 2D model: PA with cylindrical symmetry, where x is the axis of the trap and y is the radius.
+        The electrodes are taken at theta=0, so the sectors of excitation and detection electrodes become one ring.
+        It is valid when all the sectors are at the same voltage
+        """
+        assert self.has_axisymmetric_model, f"{self.__class__.__name__} has no axisymmetric model"
+        self.axisymmetric = True
+        self.unrefined_pa = self.create_dump_pa()
+        self.pa = self.unrefined_pa
+
+    def use_cache(self, directory: str, max_size: int = pa_cache.DEFAULT_MAX_SIZE):
+        """
+        skip generate, refine and adjust when they were done for the same trap, pts and settings:
+        the arrays are copied from the cache in `directory`, that is limited by `max_size` bytes
+        """
+        self.cache = pa_cache.PACache(directory, max_size)
+
+    def _cache_params(self) -> dict:
+        """
+        the parameters the generated array depends on: the class and its public attributes except the derived ones.
+        `pa_cache.make_key` raises TypeError for an attribute that can not be a parameter
+        (add it to `_derived_attributes`)
+        """
+        params = {
+            name: value for name, value in vars(self).items()
+            if not name.startswith("_") and name not in self._derived_attributes
+        }
+        params["class"] = f"{self.__class__.__module__}.{self.__class__.__qualname__}"
+        params["axisymmetric"] = self.axisymmetric
+        return params
+
     @abstractmethod
     def is_electrode(self, coords: CoordsVar):
         """is the point in the electrode"""
@@ -157,15 +229,60 @@ class AbstractTrap(metaclass=ABCMeta):
 
     def put_point(self, indexes, coords):
         """put a point to pa file"""
-        i, j, k = indexes
         if self.is_electrode(coords):
-            self.unrefined_pa.point(i, j, k, 1, self.get_electrode_type(coords))
+            self._put_electrode(indexes, self.get_electrode_type(coords))
+
+    def put_points(self, indexes, coords):
+        """
+        `put_point` for arrays of points
+        :param indexes: (i, j, k) arrays of the same shape
+        :param coords: the arrays of the coordinates of the same shape
+        """
+        electrode = np.broadcast_to(self.is_electrode(coords), indexes[0].shape)
+        e_types = self.get_electrode_type(tuple(c[electrode] for c in coords))
+        self._put_electrode(tuple(index[electrode] for index in indexes), e_types)
+
+    @classmethod
+    def _supports_arrays(cls) -> bool:
+        """are the predicates array-capable: all the trap classes of the hierarchy declare `array_predicates`"""
+        return all(
+            vars(c).get("array_predicates", False)
+            for c in cls.__mro__ if issubclass(c, AbstractTrap)
+        )
+
+    def _put_electrode(self, indexes, e_type: int):
+        """
+        make the point an electrode of `e_type`. During `generate_trap` it is only collected
+        (then `indexes` and `e_type` can be arrays)
+        """
+        i, j, k = indexes
+        if self._generated_mask is None:
+            self.unrefined_pa.point(i, j, k, 1, e_type)
+        else:
+            self._generated_mask[k, j, i] = True
+            self._generated_types[k, j, i] = e_type
+
+    def _z_indexes(self, z_range: typing.Optional[range] = None) -> typing.Iterable[int]:
+        """the indexes of z to go throw: `z_range` or all of them with the progress bar"""
+        if z_range is None:
+            return tqdm(range(self.model_lenghts.z))
+        return z_range
 
     def _go_throw_volume(self, func: typing.Callable[[typing.Tuple[int, int, int], CoordsVar], typing.Any],
-                         always_cartesian=False):
-        """go throw whole volume of the model and apply a `func`"""
+                         always_cartesian=False, z_range: typing.Optional[range] = None):
+        """go throw whole volume of the model (or the slab of `z_range`) and apply a `func`"""
         res = []
-        for k, z in tqdm(enumerate(self.grid.z), total=self.model_lenghts.z):
+        if self.axisymmetric:
+            # the plane theta=0. The indexes are in PA, where x is the axis
+            for k in self._z_indexes(z_range):
+                z = self.grid.z[k]
+                for j, radius in enumerate(self.grid.x):
+                    r = func((k, j, 0), (radius, 0.0, z))
+                    if r:
+                        res.append(r)
+            return res
+        for k in self._z_indexes(z_range):
+            z = self.grid.z[k]
             for i, x in enumerate(self.grid.x):
                 for j, y in enumerate(self.grid.y):
                     if not always_cartesian:
@@ -177,16 +294,116 @@ class AbstractTrap(metaclass=ABCMeta):
                         res.append(r)
         return res
 
-    def generate_trap(self):
-        """generate pa file"""
-        self._go_throw_volume(self.put_point)
+    def _go_throw_slices(self, func: typing.Callable[[typing.Tuple[np.ndarray, ...], typing.Tuple[np.ndarray, ...]],
+                                                     typing.Any],
+                         z_range: typing.Optional[range] = None):
+        """`_go_throw_volume` by z-slices: `func` gets the arrays of indexes and coordinates of the whole slice"""
+        if self.axisymmetric:
+            # the plane theta=0. The indexes are in PA, where x is the axis
+            j = np.arange(self.model_lenghts.x)
+            radius, theta = self.grid.x, np.zeros(self.model_lenghts.x)
+            for k in self._z_indexes(z_range):
+                func((np.full_like(j, k), j, np.zeros_like(j)), (radius, theta, np.full_like(radius, self.grid.z[k])))
+            return
+        i, j = np.indices((self.model_lenghts.x, self.model_lenghts.y))
+        if self.cylindrical_geometry:
+            # the same [i, j] points as in `_go_throw_volume`
+            first, second = self.rs, self.thetas
+        else:
+            first, second = self.grid.x[i], self.grid.y[j]
+        for k in self._z_indexes(z_range):
+            func((i, j, np.full_like(i, k)), (first, second, np.full_like(first, self.grid.z[k])))
+
+    def _rasterize(self, z_range: typing.Optional[range] = None):
+        """collect the electrodes of the slab of `z_range` (the whole model by default) to the buffers"""
+        if self._supports_arrays():
+            self._go_throw_slices(self.put_points, z_range)
+        else:
+            self._go_throw_volume(self.put_point, z_range=z_range)
+
+    def _rasterize_in_processes(self, mask: np.ndarray, types: np.ndarray, workers: int):
+        """
+        rasterize the slabs of z in the pool of `workers` processes.
+        The electrodes are collected in the shared memory and copied to `mask` and `types`
+        """
+        slabs_per_worker = 4  # the slabs are not equally hard
+        bounds = np.linspace(0, self.model_lenghts.z, workers * slabs_per_worker + 1).astype(int)
+        slabs = [range(begin, end) for begin, end in zip(bounds[:-1], bounds[1:]) if end > begin]
+        # the workers need only the geometry
+        trap = copy.copy(self)
+        trap.unrefined_pa = trap.pa = None
+        memories = [shared_memory.SharedMemory(create=True, size=buffer.nbytes) for buffer in (mask, types)]
+        try:
+            with ProcessPoolExecutor(workers) as pool:
+                futures = [
+                    pool.submit(_rasterize_slab, trap, [memory.name for memory in memories], mask.shape, slab)
+                    for slab in slabs
+                ]
+                for future in tqdm(as_completed(futures), total=len(futures)):
+                    future.result()
+            for buffer, memory in zip((mask, types), memories):
+                buffer[...] = np.ndarray(buffer.shape, dtype=buffer.dtype, buffer=memory.buf)
+        finally:
+            for memory in memories:
+                memory.close()
+                memory.unlink()
+
+    def generate_trap(self, workers: int = 1):
+        """
+        generate pa file
+        :param workers: the number of processes rasterizing the slabs of z in parallel (1 - in this process)
+        """
+        key = pa_cache.make_key("generate", self._cache_params())
+        if self.cache and self.cache.load(key, self.pa_filename):
+            self.unrefined_pa.load(f"{self.pa_filename}.pa#")
+            return
+        nx, ny, nz = self.unrefined_pa.size()
+        shape = (nz, ny, nx)
+        mask, types = np.zeros(shape, dtype=bool), np.zeros(shape)
+        if workers > 1:
+            self._rasterize_in_processes(mask, types, workers)
+        else:
+            self._generated_mask, self._generated_types = mask, types
+            try:
+                self._rasterize()
+            finally:
+                self._generated_mask = None
+                self._generated_types = None
+        self.unrefined_pa.set_points_from_mask(mask, types)
         self.unrefined_pa.save(f"{self.pa_filename}.pa#")
+        if self.cache:
+            self.cache.store(key, self.pa_filename, ["#"])
 
-    def refine_trap(self):
-        """make refine procedure of SIMION"""
-        subprocess.run([SIMION_LOCATION, NO_GUI_STR, REFINE_STR,
-                        # "--convergence=5e-3",
-                        f"{self.pa_filename}.pa#"])
+    def refine_trap(self, backend="simion", settings: typing.Optional[laplace_solver.SolverSettings] = None,
+                    previous: typing.Optional[str] = None):
+        """
+        make refine procedure of SIMION
+        :param backend: "simion" runs SIMION refine, "numpy" solves the Laplace equation in-process
+        :param settings: the settings of "numpy" backend (method, convergence, ...)
+        :param previous: `pa_filename` of the refined similar trap to start from (only "numpy" backend).
+          The iterations and time of each electrode are in `self.refine_stats`
+        """
+        assert backend in ("simion", "numpy"), f"unknown refine backend {backend}"
+        settings = settings if settings or backend == "simion" else laplace_solver.SolverSettings()
+        # the numpy refine starts from the previous arrays, so the result depends on them
+        # (but not on .pa0, it is rewritten by adjust)
+        previous_digest = None
+        if previous and backend == "numpy":
+            endings = ["#"] + [ending for ending in pa_cache.refined_endings(previous) if ending != "0"]
+            previous_digest = pa_cache.files_digest(previous, endings)
+        self._refine_key = pa_cache.make_key("refine", self._cache_params(), backend, settings, previous_digest)
+        if self.cache and self.cache.load(self._refine_key, self.pa_filename):
+            print("refine loaded from cache")
+            return
+        if backend == "numpy":
+            self.refine_stats = laplace_solver.refine_pa(self.pa_filename, settings, previous)
+        else:
+            self._check_simion()
+            subprocess.run([SIMION_LOCATION, NO_GUI_STR, REFINE_STR,
+                            # "--convergence=5e-3",
+                            f"{self.pa_filename}.pa#"])
+        if self.cache:
+            self.cache.store(self._refine_key, self.pa_filename, pa_cache.refined_endings(self.pa_filename))
 
         print("refine created")
 
@@ -207,19 +424,59 @@ class AbstractTrap(metaclass=ABCMeta):
             potential = t.to_adjust()
         return potential
 
-    def adjust_trap(self, adjust_rule: typing.Optional[typing.Callable] = None):
-        """adjust the trap. Using the given rule ore the inner rule or the common rule"""
-        voltages = []
-        for t in self._voltages:
-            potential = self.get_voltage_for_adj(t, adjust_rule)
-            voltages.append(f"{t.value}={potential}")
-        voltages = ",".join(voltages)
+    def adjust_trap(self, adjust_rule: typing.Optional[typing.Callable] = None, backend="simion"):
+        """
+        adjust the trap. Using the given rule ore the inner rule or the common rule
+        :param backend: "simion" runs SIMION fastadj,
+          "numpy" makes the superposition of .pa1...paN in-process (SIMION is not needed)
+        """
+        assert backend in ("simion", "numpy"), f"unknown adjust backend {backend}"
+        potentials = {t.value: self.get_voltage_for_adj(t, adjust_rule) for t in self._voltages}
+        voltages = ",".join([f"{n}={potential}" for n, potential in potentials.items()])
         print(voltages)
-        self._adjust_trap(voltages)
+        # the adjusted array is cached only when it is known what was refined
+        key = pa_cache.make_key("adjust", self._refine_key, backend, potentials) if self._refine_key else None
+        if key and self.cache and self.cache.load(key, self.pa_filename):
+            print("pa0 loaded from cache")
+            return
+        if backend == "numpy":
+            self._adjust_trap_numpy(potentials)
+        else:
+            self._adjust_trap(voltages)
+        if key and self.cache:
+            self.cache.store(key, self.pa_filename, ["0"])
         # voltages = ",".join([f"{v.name}={v.value}" for v in self._voltages])
 
+    def _adjust_trap_numpy(self, potentials: typing.Dict[int, float]):
+        """
+        fast adjust without SIMION: .pa0 = sum(V_n / 10000 * .paN) over fast adjustable electrodes.
+        The electrodes that are not in `potentials` and the electrodes that are not fast adjustable
+        keep their current voltage in .pa0
+        """
+        pa0 = PA(file=f"{self.pa_filename}.pa0")
+        pasharp = PA(file=f"{self.pa_filename}.pa#", mmap=True)
+        mask = pasharp.electrode_mask()
+        types = pasharp.electrode_types()
+        old_potentials = pa0.potentials()
+        fast = np.isin(types, laplace_solver.FAST_ADJUSTABLE_TYPES)
+        adjusted = np.where(mask & ~fast, old_potentials, 0.0)
+        for n in np.unique(types[mask & fast]):
+            potential = potentials.get(n)
+            if potential is None:
+                potential = old_potentials[types == n].flat[0]
+            if potential == 0:
+                continue
+            basis = PA(file=f"{self.pa_filename}.pa{n}", mmap=True)
+            adjusted += potential / laplace_solver.FAST_ADJUST_VOLTAGE * basis.potentials()
+        pa0.set_points_from_mask(~mask, adjusted, is_electrode=0)
+        pa0.set_points_from_mask(mask, adjusted)
+        pa0.pasharp(pasharp)
+        pa0.save(f"{self.pa_filename}.pa0")
+        print("pa0 created")
+
     def _adjust_trap(self, voltages):
         """simion call for adjust trap"""
+        self._check_simion()
         cmd = [
             SIMION_LOCATION, NO_GUI_STR, ADJUST_STR, f"{self.pa_filename}.pa0",
             voltages
@@ -228,8 +485,13 @@ class AbstractTrap(metaclass=ABCMeta):
         subprocess.run(cmd)
         print("pa0 created")
 
-    def load_adjusted_pa(self, ending="0"):
-        self.pa = PA(file=f"{self.pa_filename}.pa{ending}")
+    @staticmethod
+    def _check_simion():
+        assert os.path.exists(SIMION_LOCATION), f"You need to use SIMION for refine trap. Put it in {SIMION_LOCATION}"
+
+    def load_adjusted_pa(self, ending="0", mmap=False):
+        """load the pa file into `self.pa`. With `mmap` the points are read from disk only when touched"""
+        self.pa = PA(file=f"{self.pa_filename}.pa{ending}", mmap=mmap)
 
     # def get_electrode_point(self, indexes, coords):
     #     i, j, k = indexes
@@ -244,3 +506,18 @@ class AbstractTrap(metaclass=ABCMeta):
     #     return True
     #
 
+
+
+def _rasterize_slab(trap: AbstractTrap, memory_names: typing.List[str], shape: typing.Tuple[int, int, int],
+                    z_range: range):
+    """the job of `AbstractTrap._rasterize_in_processes`: collect the electrodes of a slab to the shared memory"""
+    memories = [shared_memory.SharedMemory(name=name) for name in memory_names]
+    try:
+        trap._generated_mask = np.ndarray(shape, dtype=bool, buffer=memories[0].buf)
+        trap._generated_types = np.ndarray(shape, dtype=float, buffer=memories[1].buf)
+        trap._rasterize(z_range)
+    finally:
+        trap._generated_mask = None
+        trap._generated_types = None
+        for memory in memories:
+            memory.close()
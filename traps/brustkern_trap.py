@@ -1,14 +1,40 @@
 from .cylindrical_trap import CylindricalTrap
 from .abstract_trap import CoordsVar, Coords
-from .voltage_enums import gen_voltage_enum
+from .voltage_enums import gen_voltage_enum, select_voltage
+from .sectors import EXCITATION_SECTOR, in_sector
+from .segments import SegmentTable, below
+import functools
+import typing
 import numpy as np
 
 _Voltages = gen_voltage_enum(3, 1)
 
 
+@functools.lru_cache(maxsize=16)
+def _segment_tables(voltages, z0: float, zc1: float, zc2: float, zc3: float,
+                    gap_size: float) -> typing.Tuple[SegmentTable, SegmentTable]:
+    """the tables of the gaps between the electrodes and of the electrodes along z"""
+    sector = z0 - zc1 - zc2 - zc3 - gap_size * 4
+    # the gaps start after the detection and each compensated electrode and before the end of the cell
+    gaps = [sector]
+    for zc in (zc1, zc2, zc3):
+        sector += gap_size + zc
+        gaps.append(sector)
+    gaps.append(z0 - gap_size)
+    gap_table = SegmentTable.from_intervals([(gap, gap + gap_size) for gap in gaps], [True] * len(gaps), False,
+                                            closed=False)
+    electrode_table = SegmentTable(
+        [below(gaps[0]), gaps[1], gaps[2], gaps[4]],
+        [voltages.DETECTION, voltages.COMPENSATED_0, voltages.COMPENSATED_1, voltages.COMPENSATED_2,
+         voltages.TRAPPING]
+    )
+    return gap_table, electrode_table
+
+
 class BrustkernTrap(CylindricalTrap):
     name = "brustkern"
     _voltages = _Voltages
+    array_predicates = True
 
     def __init__(self, a: float, pa_file_name="test", pts=150):
         article_r = 31.24
@@ -29,27 +55,32 @@ class BrustkernTrap(CylindricalTrap):
         )
         super(BrustkernTrap, self).__init__(a=a, z0=z0, pa_file_name=pa_file_name, pts=pts, model_border=model_border)
 
+    def _segments(self) -> typing.Tuple[SegmentTable, SegmentTable]:
+        """the gaps and the electrodes along z for the current parameters"""
+        return _segment_tables(self._voltages, self.trap_border.z, self.zc1, self.zc2, self.zc3, self.gap_size)
+
+    @property
+    def _gaps(self) -> SegmentTable:
+        """the gaps between the electrodes along z"""
+        return self._segments()[0]
+
+    @property
+    def _electrodes(self) -> SegmentTable:
+        """the electrodes along z"""
+        return self._segments()[1]
+
     def _is_endcap_electrode_simple(self, coords: CoordsVar):
         r, theta, z = coords
         return z >= self.trap_border.z + self.ze
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar):
         r, theta, z = coords
-        sector = self.trap_border.z - self.zc1 - self.zc2 - self.zc3 - self.gap_size * 4
-        if z < sector:
-            if 0 <= theta <= np.pi / 4:
-                return self._voltages.EXCITATION
-            return self._voltages.DETECTION
-        sector += self.gap_size + self.zc1
-        if z <= sector:
-            return self._voltages.COMPENSATED_0
-        sector += self.gap_size + self.zc2
-        if z <= sector:
-            return self._voltages.COMPENSATED_1
-        elif z <= self.trap_border.z - self.gap_size:
-            return self._voltages.COMPENSATED_2
-        else:
-            return self._voltages.TRAPPING
+        electrode = self._electrodes.index(z)
+        return select_voltage(
+            [(electrode == 0) & in_sector(theta, *EXCITATION_SECTOR)],
+            [self._voltages.EXCITATION],
+            self._electrodes.value_of(electrode)
+        )
 
     def get_endcap_electrode_type(self, coords: CoordsVar):
         """type of trap electrode. Can depends on coordinates"""
@@ -57,25 +88,7 @@ class BrustkernTrap(CylindricalTrap):
 
     def _is_other_electrode_simple(self, coords: CoordsVar):
         r, theta, z = coords
-        if r ** 2 < self.trap_border.x ** 2:
-            return False
-        else:
-            sector = self.trap_border.z - self.zc1 - self.zc2 - self.zc3 - self.gap_size * 4
-            if sector < z < sector + self.gap_size:
-                return False
-            sector += self.gap_size + self.zc1
-            if sector < z < sector + self.gap_size:
-                return False
-            sector += self.gap_size + self.zc2
-            if sector < z < sector + self.gap_size:
-                return False
-            sector += self.gap_size + self.zc3
-            if sector < z < sector + self.gap_size:
-                return False
-            sector = self.trap_border.z - self.gap_size
-            if sector < z < sector + self.gap_size:
-                return False
-            return True
+        return (r ** 2 >= self.trap_border.x ** 2) & np.logical_not(self._gaps.lookup(z))
 
     def new_adjust_rule(self, voltage):
         k = 0.06269
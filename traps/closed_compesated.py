@@ -1,13 +1,14 @@
 from traps.abstract_trap import Coords, CoordsVar
 from traps.cylindrical_trap import CylindricalTrap
 from .abstract_penning_with_simple_electrode_trap import AbstractPenningTrapWithSimpleElectrodes
-from .voltage_enums import CompensatedVoltages
+from .voltage_enums import CompensatedVoltages, select_voltage
 import numpy as np
 
 
 class ClosedCompesatedCylindricalTrap(CylindricalTrap):
     name = "closed_compensated"
     _voltages = CompensatedVoltages
+    array_predicates = True
 
     def __init__(self, z0: float, a: float, dzc: float, pa_file_name="test", *, pts=150):
         # dzc = z0*dz2z_ratio
@@ -16,10 +17,11 @@ class ClosedCompesatedCylindricalTrap(CylindricalTrap):
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar):
         r, theta, z = coords
-        if z < self.trap_border.z - self.dzc:
-            return super(ClosedCompesatedCylindricalTrap, self).calculate_nontrap_electrode_type(coords)
-        else:
-            return CompensatedVoltages.COMPENSATED
+        return select_voltage(
+            [z < self.trap_border.z - self.dzc],
+            [super(ClosedCompesatedCylindricalTrap, self).calculate_nontrap_electrode_type(coords)],
+            CompensatedVoltages.COMPENSATED
+        )
 
     def new_adjust_rule(self, voltage):
         if voltage.value == CompensatedVoltages.TRAPPING.value:
@@ -1,11 +1,12 @@
 from .abstract_penning_with_simple_electrode_trap import AbstractPenningTrapWithSimpleElectrodes
 from .abstract_trap import CoordsVar, Coords
-from .voltage_enums import TrappedVoltages
+from .voltage_enums import TrappedVoltages, select_voltage
 
 
 class CubicTrap(AbstractPenningTrapWithSimpleElectrodes):
 
     name = "cubic"
+    array_predicates = True
 
     def _is_endcap_electrode_simple(self, coords: CoordsVar):
         x, y, z = coords
@@ -13,13 +14,11 @@ class CubicTrap(AbstractPenningTrapWithSimpleElectrodes):
 
     def _is_other_electrode_simple(self, coords: CoordsVar):
         x, y, z = coords
-        return x >= self.size or y >= self.size
+        return (x >= self.size) | (y >= self.size)
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar) -> TrappedVoltages:
         x, y, z = coords
-        if x >= self.size:
-            return TrappedVoltages.DETECTION
-        return TrappedVoltages.EXCITATION
+        return select_voltage([x >= self.size], [TrappedVoltages.DETECTION], TrappedVoltages.EXCITATION)
 
     def __init__(self, size: float, pa_file_name="test", *, pts=150
                  ):
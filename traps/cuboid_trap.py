@@ -1,11 +1,12 @@
 from traps.abstract_trap import Coords, CoordsVar
 from .abstract_penning_with_simple_electrode_trap import AbstractPenningTrapWithSimpleElectrodes
-from .voltage_enums import TrappedVoltages
+from .voltage_enums import TrappedVoltages, select_voltage
 
 
 class CuboidTrap(AbstractPenningTrapWithSimpleElectrodes):
 
     name = "cuboid"
+    array_predicates = True
 
     def _is_endcap_electrode_simple(self, coords: CoordsVar):
         x, y, z = coords
@@ -13,13 +14,11 @@ class CuboidTrap(AbstractPenningTrapWithSimpleElectrodes):
 
     def _is_other_electrode_simple(self, coords: CoordsVar):
         x, y, z = coords
-        return x >= self.trap_border.x or y >= self.trap_border.y
+        return (x >= self.trap_border.x) | (y >= self.trap_border.y)
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar) -> TrappedVoltages:
         x, y, z = coords
-        if x >= self.trap_border.x:
-            return TrappedVoltages.DETECTION
-        return TrappedVoltages.EXCITATION
+        return select_voltage([x >= self.trap_border.x], [TrappedVoltages.DETECTION], TrappedVoltages.EXCITATION)
 
     def __init__(self, x0, y0, z0, pa_file_name="test", *, pts=150
                  ):
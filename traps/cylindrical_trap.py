@@ -1,11 +1,14 @@
 from traps.abstract_trap import Coords, CoordsVar
 from .abstract_penning_with_simple_electrode_trap import AbstractPenningTrapWithSimpleElectrodes
 from .voltage_enums import TrappedVoltages
+from .sectors import EXCITATION_SECTOR, select_sector
 import numpy as np
 
 
 class CylindricalTrap(AbstractPenningTrapWithSimpleElectrodes):
     name = "cylindrical"
+    has_axisymmetric_model = True
+    array_predicates = True
 
     def _is_endcap_electrode_simple(self, coords: CoordsVar):
         r, theta, z = coords
@@ -13,16 +16,11 @@ class CylindricalTrap(AbstractPenningTrapWithSimpleElectrodes):
 
     def _is_other_electrode_simple(self, coords: CoordsVar):
         r, theta, z = coords
-        if r ** 2 < self.trap_border.x ** 2:
-            return False
-        else:
-            return True
+        return r ** 2 >= self.trap_border.x ** 2
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar) -> TrappedVoltages:
         r, theta, z = coords
-        if 0 <= theta <= np.pi/4:
-            return TrappedVoltages.EXCITATION
-        return TrappedVoltages.DETECTION
+        return select_sector(theta, [EXCITATION_SECTOR], [TrappedVoltages.EXCITATION], TrappedVoltages.DETECTION)
 
     def __init__(self, z0: float, a: float, pa_file_name="test", model_border=None, electrode_width=1.6, *, pts=150):
         super().__init__(Coords(x=a, y=a, z=z0), pa_file_name=pa_file_name, pts=pts, cylindrical_geometry=True, model_border=model_border, electrode_width=electrode_width)
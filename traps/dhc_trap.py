@@ -1,5 +1,6 @@
 from traps.abstract_trap import Coords, CoordsVar
-from .voltage_enums import TrappedVoltages2
+from .voltage_enums import TrappedVoltages2, select_voltage
+from .sectors import EXCITATION_SECTOR, in_periodic_sectors, in_sector
 from traps.cylindrical_trap import CylindricalTrap
 import numpy as np
 
@@ -7,7 +8,9 @@ import numpy as np
 class DHCTrap(CylindricalTrap):
 
     name = "DHC"
+    has_axisymmetric_model = False
     _voltages = TrappedVoltages2
+    array_predicates = True
 
     def _is_endcap_electrode_simple(self, coords: CoordsVar):
         """
@@ -16,10 +19,7 @@ class DHCTrap(CylindricalTrap):
         """
         r, theta, z = coords
         # z *= 1.05 # for 3D visualization with expanding
-        if 2 * z ** 2 - (r ** 2) >= 2 * self.trap_border.z ** 2 - self.trap_border.x ** 2:
-            return True
-        else:
-            return False
+        return 2 * z ** 2 - (r ** 2) >= 2 * self.trap_border.z ** 2 - self.trap_border.x ** 2
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar) -> TrappedVoltages2:
         r, theta, z = coords
@@ -31,25 +31,20 @@ class DHCTrap(CylindricalTrap):
         self.alpha_0 = beta*np.pi/N
         super().__init__(z0=z0, a=a, pa_file_name=pa_file_name, pts=pts)
 
-    def _get_phi_arias(self, n, z):
-        """get the area, where there is voltage"""
+    def _get_phi_half_width(self, z):
+        """get the half of the angle of the areas, where there is voltage. They are around 2*pi*(n + 1/2)/N"""
         N, z0 = self.N, self.trap_border.z
-        center = 2 * np.pi * (n + 1.0 / 2) / N
-        delta_ = np.pi / N + self.alpha_0 * ((z / z0) ** 2 - 1)
-        return center - delta_, center + delta_
+        return np.pi / N + self.alpha_0 * ((z / z0) ** 2 - 1)
 
     def _get_electrode_type(self, theta, z):
         """get electrode type on this angle theta"""
-        N, z0 = self.N, self.trap_border.z
-        for n in range(N):
-            l, r = self._get_phi_arias(n, z)
-            if l <= theta <= r:
-                return self._voltages.TRAPPING_B
-            if l <= theta+2*np.pi <= r:
-                return self._voltages.TRAPPING_B
-        if 0 <= theta <= np.pi/4:
-            return self._voltages.EXCITATION
-        return self._voltages.DETECTION
+        N = self.N
+        in_aria = in_periodic_sectors(theta, N, self._get_phi_half_width(z), first_center=np.pi / N)
+        return select_voltage(
+            [in_aria, in_sector(theta, *EXCITATION_SECTOR)],
+            [self._voltages.TRAPPING_B, self._voltages.EXCITATION],
+            self._voltages.DETECTION
+        )
 
     def new_adjust_rule(self, voltage):
         if voltage.value == TrappedVoltages2.TRAPPING.value or voltage.value == TrappedVoltages2.TRAPPING_B.value:
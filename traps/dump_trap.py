@@ -2,6 +2,8 @@ from traps.abstract_trap import AbstractTrap, Coords, CoordsVar
 
 
 class DumpTrap(AbstractTrap):
+    array_predicates = True
+
     def is_electrode(self, coords: CoordsVar):
         return True
 
@@ -1,27 +1,26 @@
 from .abstract_trap import CoordsVar
 from .hyperbolic_trap import HyperbolicTrap
 import numpy as np
-from .voltage_enums import Voltages, CompensatedVoltages
+from .voltage_enums import Voltages, CompensatedVoltages, select_voltage
+from .sectors import EXCITATION_SECTOR, in_sector
 
 
 class HyperbolicCompensatedTrap(HyperbolicTrap):
 
     name = "hyperbolic_compensated"
     _voltages = CompensatedVoltages
+    array_predicates = True
 
     def __init__(self, z0: float, a: float, rc: float, r_max: float, pa_file_name="test", *, pts=150):
         self.rc = rc
         super(HyperbolicCompensatedTrap, self).__init__(a=a, z0=z0, r_max=r_max, pa_file_name=pa_file_name, pts=pts)
 
     def _is_other_electrode_simple(self, coords: CoordsVar):
-        return self._ring_simple(coords) or self._is_compensated_electrode_simple(coords)
+        return self._ring_simple(coords) | self._is_compensated_electrode_simple(coords)
 
     def _is_compensated_electrode_simple(self, coords: CoordsVar):
-        # if in other electrodes - return
-        if self._is_endcap_electrode_simple(coords):
-            return False
-        if self._ring_simple(coords):
-            return False
+        # if in other electrodes - not
+        in_other = self._is_endcap_electrode_simple(coords) | self._ring_simple(coords)
 
         # intersection with ring:
         z_1 = np.sqrt((self.rc**2 - self.trap_border.x**2)/3)
@@ -38,19 +37,18 @@ class HyperbolicCompensatedTrap(HyperbolicTrap):
         middle_z = self.rc * np.cos(middle_theta)
         middle_rho = self.rc * np.sin(middle_theta)
         r, theta, z = coords
-        if r > self.r_max:
-            return False
-        if z >= -(middle_rho/middle_z) * (r - middle_rho) + middle_z:
-            return True
-        return False
+        return (
+            np.logical_not(in_other) & (r <= self.r_max)
+            & (z >= -(middle_rho/middle_z) * (r - middle_rho) + middle_z)
+        )
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar) -> Voltages:
-        if self._is_compensated_electrode_simple(coords):
-            return CompensatedVoltages.COMPENSATED
         r, theta, z = coords
-        if 0 <= theta <= np.pi/4:
-            return CompensatedVoltages.EXCITATION
-        return CompensatedVoltages.DETECTION
+        return select_voltage(
+            [self._is_compensated_electrode_simple(coords), in_sector(theta, *EXCITATION_SECTOR)],
+            [CompensatedVoltages.COMPENSATED, CompensatedVoltages.EXCITATION],
+            CompensatedVoltages.DETECTION
+        )
 
     def new_adjust_rule(self, voltage):
         if voltage.value == CompensatedVoltages.EXCITATION.value:
@@ -1,7 +1,7 @@
 from traps.abstract_trap import Coords, CoordsVar
 from traps.cylindrical_trap import CylindricalTrap
 from .abstract_penning_with_simple_electrode_trap import AbstractPenningTrapWithSimpleElectrodes
-from .voltage_enums import gen_voltage_enum
+from .voltage_enums import gen_voltage_enum, select_voltage
 import numpy as np
 
 _Voltages = gen_voltage_enum(0, 4)
@@ -9,7 +9,9 @@ _Voltages = gen_voltage_enum(0, 4)
 
 class InfinityCell(CylindricalTrap):
     name = "infinity_cell"
+    has_axisymmetric_model = False
     _voltages = _Voltages
+    array_predicates = True
 
     def __init__(self, z0: float, a: float, pa_file_name="test", *, pts=150):
         self.levels = [0, 0.1, 0.2, 0.4, 1]
@@ -18,30 +20,60 @@ class InfinityCell(CylindricalTrap):
     def get_endcap_electrode_type(self, coords: CoordsVar):
         r, theta, z = coords
         # theta += np.pi/4
-        inf_trap_potential = self._get_infinity_trap_potential(r, self.trap_border.x, theta)
-        if np.abs(inf_trap_potential) < self.levels[1]:
-            return self._voltages.TRAPPING_0
-        if self.levels[1] <= np.abs(inf_trap_potential) < self.levels[2]:
-            return self._voltages.TRAPPING_1
-        if self.levels[2] <= np.abs(inf_trap_potential) < self.levels[3]:
-            return self._voltages.TRAPPING_2
-        # if self.levels[3] <= np.abs(inf_trap_potential) < self.levels[4]:
-        #     return self._voltages.TRAPPING_3
-        # if self.levels[4] <= np.abs(inf_trap_potential):
-        return self._voltages.TRAPPING_3
-
-    @staticmethod
-    def _get_infinity_trap_potential(r, R, _phi, max_n=100):
-        alpha = np.pi/4
+        inf_trap_potential = np.abs(self._get_infinity_trap_potential(r, self.trap_border.x, theta))
+        return select_voltage(
+            [
+                inf_trap_potential < self.levels[1],
+                (self.levels[1] <= inf_trap_potential) & (inf_trap_potential < self.levels[2]),
+                (self.levels[2] <= inf_trap_potential) & (inf_trap_potential < self.levels[3]),
+            ],
+            [self._voltages.TRAPPING_0, self._voltages.TRAPPING_1, self._voltages.TRAPPING_2],
+            # the 4th and the 5th levels
+            self._voltages.TRAPPING_3
+        )
+
+    _alpha = np.pi/4
+
+    @classmethod
+    def _get_infinity_trap_potential(cls, r, R, _phi):
+        """
+        the sum of the series `_get_infinity_trap_potential_series` (works with arrays as well):
+        sum of q^k sin(k*x)/k over odd k is arctan(2q sin(x) / (1 - q^2)) / 2.
+        The series diverges for r > R, there the potential of the border r = R is taken
+        """
         phi = _phi - np.pi/2
+        q = np.minimum(r / R, 1)
+        return (
+            np.arctan2(2 * q * np.sin(cls._alpha + phi), 1 - q ** 2)
+            + np.arctan2(2 * q * np.sin(cls._alpha - phi), 1 - q ** 2)
+        ) / (2 * np.pi)
+
+    @classmethod
+    def _get_infinity_trap_potential_series(cls, r, R, _phi, max_n=100):
+        """the first `max_n` terms of the series of the potential"""
+        phi = np.asarray(_phi)[..., np.newaxis] - np.pi/2
+        k = 2 * np.arange(max_n) + 1
+        f = (np.asarray(r)[..., np.newaxis] / R) ** k
+        s = 2 * np.sin(k * cls._alpha) / (k * np.pi)
+        t = np.cos(k * phi)
+        return np.sum(f * s * t, axis=-1)
 
-        def under_sum(n):
-            k = 2 * n + 1
-            f = (r / R) ** k
-            s = 2 * np.sin(k * alpha) / (k * np.pi)
-            t = np.cos(k * phi)
-            return f * s * t
-        return sum([under_sum(i) for i in range(max_n)])
+    @classmethod
+    def check_potential_accuracy(cls, max_n=100, r_max=0.95, pts=201, tolerance=1e-6) -> float:
+        """
+        compare the closed form of the potential with the series on the (r/R, phi) grid
+        :param max_n: the number of terms of the series
+        :param r_max: the largest r/R to check (the series converges slowly near 1)
+        :param pts: the number of points per r and phi
+        :param tolerance: the allowed difference
+        :return: the largest difference
+        """
+        r, phi = np.meshgrid(np.linspace(0, r_max, pts), np.linspace(0, 2 * np.pi, pts))
+        error = np.max(np.abs(
+            cls._get_infinity_trap_potential(r, 1, phi) - cls._get_infinity_trap_potential_series(r, 1, phi, max_n)
+        ))
+        assert error <= tolerance, f"the closed form differs from the series of {max_n} terms by {error}"
+        return error
 
     def new_adjust_rule(self, voltage):
         k = 7.7821
@@ -1,6 +1,7 @@
 from .cylindrical_trap import CylindricalTrap
 from .abstract_trap import CoordsVar, Coords
-from .voltage_enums import CompensatedVoltages
+from .voltage_enums import CompensatedVoltages, select_voltage
+from .sectors import in_sector
 import numpy as np
 
 _Voltages = CompensatedVoltages
@@ -8,7 +9,9 @@ _Voltages = CompensatedVoltages
 
 class KanawatyTrap(CylindricalTrap):
     name = "kanawaty"
+    has_axisymmetric_model = False
     _voltages = _Voltages
+    array_predicates = True
 
     def __init__(self, a: float, pa_file_name="test", pts=150):
         or_r = 46/2
@@ -29,32 +32,29 @@ class KanawatyTrap(CylindricalTrap):
 
     def is_other_electrode(self, coords: CoordsVar) -> bool:
         r, theta, z = coords
-
-        if z <= self.trap_border.z:
-            return self.trap_border.x ** 2 <= r**2 <= (self.trap_border.x + self.electrode_width)**2
-        else:
-            if z <= self.trap_border.z + self.ring_z:
-                return self.ring_r ** 2 <= r ** 2 <= (self.ring_r + self.electrode_width) ** 2
+        return np.where(
+            z <= self.trap_border.z,
+            (self.trap_border.x ** 2 <= r**2) & (r**2 <= (self.trap_border.x + self.electrode_width)**2),
+            (z <= self.trap_border.z + self.ring_z)
+            & (self.ring_r ** 2 <= r ** 2) & (r ** 2 <= (self.ring_r + self.electrode_width) ** 2)
+        )
 
     def is_endcap_electrode(self, coords: CoordsVar) -> bool:
         r, theta, z = coords
-        if r > self.trap_border.x:
-            return False
-        if r < self.ring_r:
-            return False
-        return self.trap_border.z <= z <= self.trap_border.z + self.electrode_width
+        return (
+            (self.ring_r <= r) & (r <= self.trap_border.x)
+            & (self.trap_border.z <= z) & (z <= self.trap_border.z + self.electrode_width)
+        )
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar):
         r, theta, z = coords
-        if z <= self.trap_border.z:
-            if 0 <= theta <= np.pi / 8:
-                return self._voltages.EXCITATION
-            if 3* np.pi / 8 <= theta <= np.pi / 2:
-                return self._voltages.EXCITATION
-
-            return self._voltages.DETECTION
-        else:
-            return CompensatedVoltages.COMPENSATED
+        inside = z <= self.trap_border.z
+        excitation = in_sector(theta, 0, np.pi / 8) | in_sector(theta, 3 * np.pi / 8, np.pi / 2)
+        return select_voltage(
+            [inside & excitation, inside],
+            [self._voltages.EXCITATION, self._voltages.DETECTION],
+            CompensatedVoltages.COMPENSATED
+        )
 
     def new_adjust_rule(self, voltage):
         k = 0.335
@@ -1,12 +1,21 @@
 from .cylindrical_trap import CylindricalTrap
-from .voltage_enums import CompensatedVoltages
+from .voltage_enums import CompensatedVoltages, select_voltage
 from .abstract_trap import Coords, CoordsVar
+from .segments import SegmentTable, below
+import functools
 import numpy as np
 
 
+@functools.lru_cache(maxsize=16)
+def _electrode_table(z0: float, dzc: float) -> SegmentTable:
+    """the ring electrodes, the compensated one and the end of the cell along z"""
+    return SegmentTable([below(z0 - dzc), z0])
+
+
 class OpenCompensatedCylindricalTrap(CylindricalTrap):
     name = "open_compesated"
     _voltages = CompensatedVoltages
+    array_predicates = True
 
     def __init__(self, z0: float, a: float, dzc: float, ze: float, pa_file_name="test", *, pts=150):
         self.ze = ze
@@ -20,17 +29,23 @@ class OpenCompensatedCylindricalTrap(CylindricalTrap):
         )
         super().__init__(z0=z0, a=a, pa_file_name=pa_file_name, pts=pts, model_border=model_border)
 
+    @property
+    def _electrodes(self) -> SegmentTable:
+        """the electrodes along z for the current parameters"""
+        return _electrode_table(self.trap_border.z, self.dzc)
+
     def _is_endcap_electrode_simple(self, coords: CoordsVar):
         return False
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar):
         r, theta, z = coords
-        if z < self.trap_border.z - self.dzc:
-            return super(OpenCompensatedCylindricalTrap, self).calculate_nontrap_electrode_type(coords)
-        elif z <= self.trap_border.z:
-            return CompensatedVoltages.COMPENSATED
-        else:
-            return CompensatedVoltages.TRAPPING
+        electrode = self._electrodes.index(z)
+        return select_voltage(
+            [electrode == 0, electrode == 1],
+            [super(OpenCompensatedCylindricalTrap, self).calculate_nontrap_electrode_type(coords),
+             CompensatedVoltages.COMPENSATED],
+            CompensatedVoltages.TRAPPING
+        )
 
     def new_adjust_rule(self, voltage):
         if voltage.value == CompensatedVoltages.TRAPPING.value:
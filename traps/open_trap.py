@@ -1,5 +1,6 @@
 from .cylindrical_trap import CylindricalTrap
-from .voltage_enums import gen_voltage_enum
+from .voltage_enums import gen_voltage_enum, select_voltage
+from .sectors import EXCITATION_SECTOR, in_sector
 from .abstract_trap import Coords, CoordsVar
 import numpy as np
 
@@ -9,6 +10,7 @@ _Voltages = gen_voltage_enum(0, 2)
 class OpenCylindricalTrap(CylindricalTrap):
     name = "open_trap"
     _voltages = _Voltages
+    array_predicates = True
 
     def __init__(self, a: float, z0: float, ze: float, pa_file_name="test", *, pts=150):
         self.ze = ze
@@ -26,12 +28,11 @@ class OpenCylindricalTrap(CylindricalTrap):
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar):
         r, theta, z = coords
-        if z < self.trap_border.z:
-            if 0 <= theta <= np.pi / 4:
-                return self._voltages.EXCITATION
-            return self._voltages.DETECTION
-        else:
-            if 0 <= theta <= np.pi / 4:
-                return self._voltages.TRAPPING_0
-            return self._voltages.TRAPPING_1
+        sector = in_sector(theta, *EXCITATION_SECTOR)
+        inside = z < self.trap_border.z
+        return select_voltage(
+            [inside & sector, inside, sector],
+            [self._voltages.EXCITATION, self._voltages.DETECTION, self._voltages.TRAPPING_0],
+            self._voltages.TRAPPING_1
+        )
 
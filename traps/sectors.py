@@ -0,0 +1,33 @@
+"""
+the angular sectors of the electrodes (works with arrays as well).
+The angles are compared modulo 2*pi, so a sector can cross theta=0 and theta can be given in (-pi, pi]
+"""
+from typing import Sequence, Tuple
+
+import numpy as np
+
+from .voltage_enums import select_voltage
+
+FULL_TURN = 2 * np.pi
+# the standard sector of the excitation electrode, the rest of the ring is the detection one
+EXCITATION_SECTOR = (0, np.pi / 4)
+
+
+def in_sector(theta, begin: float, end: float):
+    """is theta in the sector from `begin` counterclockwise to `end` (the borders are included)"""
+    return np.mod(theta - begin, FULL_TURN) <= np.mod(end - begin, FULL_TURN)
+
+
+def in_periodic_sectors(theta, number: int, half_width, first_center: float = 0):
+    """
+    is theta in one of the `number` equal sectors around the angles first_center + 2*pi*n/number
+    :param half_width: the half of the angle of a sector (can be an array, e.g. depend on z)
+    """
+    period = FULL_TURN / number
+    offset = np.mod(theta - first_center, period)
+    return (offset <= half_width) | (period - offset <= half_width)
+
+
+def select_sector(theta, sectors: Sequence[Tuple[float, float]], choices: Sequence, default):
+    """`select_voltage` with the conditions that theta is in the sectors (begin, end)"""
+    return select_voltage([in_sector(theta, *sector) for sector in sectors], choices, default)
@@ -0,0 +1,78 @@
+"""
+the segments of the electrodes along one axis (the stacked rings along z, the concentric rings along r).
+The borders are sorted once, the points are classified with `np.searchsorted` (works with arrays as well)
+"""
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def below(border: float) -> float:
+    """the border for the condition `x < border`: the borders of a table belong to the lower segments"""
+    return np.nextafter(border, -np.inf)
+
+
+def near_grid_points(x, step: float, number: int, radius: float):
+    """
+    is x within `radius` of one of the points n*step, n = 0..number-1 (e.g. the wires of a grid).
+    Only the two nearest points are checked, so the cost does not depend on `number`
+    """
+    nearest = np.clip(np.floor(np.divide(x, step)), 0, number - 1)
+    near = False
+    for n in (nearest, np.minimum(nearest + 1, number - 1)):
+        center = n * step
+        near = near | ((center - radius <= x) & (x <= center + radius))
+    return near
+
+
+class SegmentTable:
+    """
+    the segments (-inf, borders[0]], (borders[0], borders[1]], ..., (borders[-1], inf) with theirs values.
+    Use `below` for a border that belongs to the upper segment
+    """
+
+    def __init__(self, borders: Sequence[float], values: Optional[Sequence] = None):
+        """
+        :param borders: the sorted borders of the segments
+        :param values: the value of each segment (one more than borders), e.g. the voltages of the electrodes.
+          The numbers of the segments by default
+        """
+        self.borders = np.asarray(borders, dtype=float)
+        assert np.all(np.diff(self.borders) >= 0), f"the borders are not sorted: {self.borders}"
+        self.values = list(values) if values is not None else list(range(len(self.borders) + 1))
+        assert len(self.values) == len(self.borders) + 1, "there should be the value for each segment"
+        self._value_array = np.array([getattr(value, "value", value) for value in self.values])
+
+    @classmethod
+    def from_intervals(cls, intervals: Sequence[Tuple[float, float]], values: Sequence, default, closed=True):
+        """
+        the table of the intervals (begin, end) with the values and `default` between them.
+        The overlapping intervals of the same value are merged
+        :param closed: are the ends included to the intervals
+        """
+        merged = []
+        for (begin, end), value in sorted(zip(intervals, values), key=lambda interval: interval[0][0]):
+            if merged and (begin <= merged[-1][1] if closed else begin < merged[-1][1]):
+                assert value == merged[-1][2], f"the intervals of the different values overlap at {begin}"
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([begin, end, value])
+        borders, segment_values = [], [default]
+        for begin, end, value in merged:
+            borders += [below(begin), end] if closed else [begin, below(end)]
+            segment_values += [value, default]
+        return cls(borders, segment_values)
+
+    def index(self, x):
+        """the number of the segment of x"""
+        return np.searchsorted(self.borders, x, side="left")
+
+    def lookup(self, x):
+        """the value of the segment of x. For arrays -- the array of the values (as `select_voltage`)"""
+        return self.value_of(self.index(x))
+
+    def value_of(self, index):
+        """the value of the segment number `index` (the result of `index`)"""
+        if np.ndim(index) == 0:
+            return self.values[int(index)]
+        return self._value_array[index]
@@ -1,14 +1,27 @@
 from .cylindrical_trap import CylindricalTrap
 from .abstract_trap import CoordsVar, Coords
-from .voltage_enums import gen_voltage_enum
+from .voltage_enums import gen_voltage_enum, select_voltage
+from .sectors import in_sector
+from .segments import SegmentTable, below
+import functools
 import numpy as np
 
 _Voltages = gen_voltage_enum(2, 1)
 
 
+@functools.lru_cache(maxsize=16)
+def _electrode_table(voltages, z0: float, zc1: float, zc2: float) -> SegmentTable:
+    """the electrodes along z: detection, two compensated and trapping ones"""
+    return SegmentTable(
+        [below(z0 - zc1 - zc2), z0 - zc2, z0],
+        [voltages.DETECTION, voltages.COMPENSATED_0, voltages.COMPENSATED_1, voltages.TRAPPING]
+    )
+
+
 class TolmachovTrap(CylindricalTrap):
     name = "tolmachov"
     _voltages = _Voltages
+    array_predicates = True
 
     def __init__(self, a: float, pa_file_name="test", pts=150):
         D = 2*a
@@ -25,21 +38,22 @@ class TolmachovTrap(CylindricalTrap):
         )
         super(TolmachovTrap, self).__init__(a=a, z0=z0, pa_file_name=pa_file_name, pts=pts, model_border=model_border)
 
+    @property
+    def _electrodes(self) -> SegmentTable:
+        """the electrodes along z for the current parameters"""
+        return _electrode_table(self._voltages, self.trap_border.z, self.zc1, self.zc2)
+
     def _is_endcap_electrode_simple(self, coords: CoordsVar):
         return False
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar):
         r, theta, z = coords
-        if z < self.trap_border.z - self.zc1 - self.zc2:
-            if 0 <= theta <= np.pi / 6:
-                return self._voltages.EXCITATION
-            return self._voltages.DETECTION
-        elif z <= self.trap_border.z - self.zc2:
-            return self._voltages.COMPENSATED_0
-        elif z <= self.trap_border.z:
-            return self._voltages.COMPENSATED_1
-        else:
-            return self._voltages.TRAPPING
+        electrode = self._electrodes.index(z)
+        return select_voltage(
+            [(electrode == 0) & in_sector(theta, 0, np.pi / 6)],
+            [self._voltages.EXCITATION],
+            self._electrodes.value_of(electrode)
+        )
 
     def new_adjust_rule(self, voltage):
         k = 2.3
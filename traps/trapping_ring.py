@@ -1,15 +1,26 @@
 from traps.abstract_trap import Coords, CoordsVar
 from traps.cylindrical_trap import CylindricalTrap
 from .abstract_penning_with_simple_electrode_trap import AbstractPenningTrapWithSimpleElectrodes
-from .voltage_enums import gen_voltage_enum
+from .voltage_enums import gen_voltage_enum, select_voltage
+from .segments import SegmentTable
+import functools
 import numpy as np
 
 _Voltages = gen_voltage_enum(0, 5)
 
 
+@functools.lru_cache(maxsize=16)
+def _ring_table(a: float, last_offset: float, ring_space: float, ring_width: float) -> SegmentTable:
+    """the numbers of the rings along r, -1 between them"""
+    first_offset = a - last_offset + ring_space - 5 * (ring_space + ring_width)
+    lefts = [first_offset + i * (ring_width + ring_space) for i in range(5)]
+    return SegmentTable.from_intervals([(left, left + ring_width) for left in lefts], range(5), -1)
+
+
 class TrappingRingTrap(CylindricalTrap):
     name = "trapping_ring"
     _voltages = _Voltages
+    array_predicates = True
 
     def __init__(self, a: float, pa_file_name="test", *, pts=150):
         self.ring_width = 0.110
@@ -23,40 +34,31 @@ class TrappingRingTrap(CylindricalTrap):
         self.last_offset = self.ring_space*2
         super().__init__(z0=z0, a=a, pa_file_name=pa_file_name, pts=pts)
 
+    @property
+    def _rings(self) -> SegmentTable:
+        """the rings along r for the current parameters"""
+        return _ring_table(self.trap_border.x, self.last_offset, self.ring_space, self.ring_width)
+
     def _is_endcap_electrode_simple(self, coords: CoordsVar):
         r, theta, z = coords
-        if z >= self.trap_border.z:
-            return self._get_ring_number(r) > -1
-        else:
-            return False
+        return (z >= self.trap_border.z) & (self._get_ring_number(r) > -1)
 
     def get_endcap_electrode_type(self, coords: CoordsVar):
         r, theta, z = coords
         r_num = self._get_ring_number(r)
-        if r_num == 0:
-            return self._voltages.TRAPPING_0
-        if r_num == 1:
-            return self._voltages.TRAPPING_1
-        if r_num == 2:
-            return self._voltages.TRAPPING_2
-        if r_num == 3:
-            return self._voltages.TRAPPING_3
-        if r_num == 4:
-            return self._voltages.TRAPPING_4
+        return select_voltage(
+            [r_num == 0, r_num == 1, r_num == 2, r_num == 3],
+            [self._voltages.TRAPPING_0, self._voltages.TRAPPING_1, self._voltages.TRAPPING_2,
+             self._voltages.TRAPPING_3],
+            self._voltages.TRAPPING_4
+        )
 
     def _is_other_electrode_simple(self, coords: CoordsVar):
         r, theta, z = coords
-        if z >= self.trap_border.z:
-            return False
-        return super(TrappingRingTrap, self)._is_other_electrode_simple(coords)
+        return (z < self.trap_border.z) & super(TrappingRingTrap, self)._is_other_electrode_simple(coords)
 
     def _get_ring_number(self, r):
-        first_offset = self.trap_border.x - self.last_offset + self.ring_space - 5 * (self.ring_space + self.ring_width)
-        for i in range(0, 5):
-            if first_offset + i * (self.ring_width + self.ring_space) <= r:
-                if r <= first_offset + i * (self.ring_width + self.ring_space) + self.ring_width:
-                    return i
-        return -1
+        return self._rings.lookup(r)
 
     def new_adjust_rule(self, voltage):
         k = 1
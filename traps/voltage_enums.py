@@ -1,5 +1,9 @@
+import functools
+import re
 from enum import Enum
-from typing import Tuple
+from typing import Tuple, Sequence, Union
+
+import numpy as np
 
 
 class Voltages(Enum):
@@ -104,8 +108,35 @@ class TrappedVoltages2(Voltages):
             return "red", "Trapping electrode"
 
 
+def select_voltage(conditions: Sequence, choices: Sequence[Union["Voltages", np.ndarray]], default):
+    """
+    `np.select` for electrode types: the first choice which condition is true, `default` if no one.
+    For scalar conditions the chosen voltage is returned, for arrays -- the array of the voltage values.
+    The choices can be the results of other `select_voltage` calls
+    """
+    if all(np.ndim(condition) == 0 for condition in conditions):
+        return next((choice for condition, choice in zip(conditions, choices) if condition), default)
+    choices = [*choices, default]
+    index = np.select(conditions, np.arange(len(choices) - 1), len(choices) - 1)
+    if np.ndim(index) == 0:
+        return choices[int(index)]
+    return np.choose(index, [np.asarray(getattr(choice, "value", choice)) for choice in choices])
+
+
 def gen_voltage_enum(num_of_compensated=0, num_of_trapped=0):
-    """use python magic for create new voltage enums dinamically"""
+    """
+    use python magic for create new voltage enums dinamically.
+    The enum is `VoltagesC{num_of_compensated}T{num_of_trapped}` of this module, so it can be pickled
+    (e.g. for the processes of `generate_trap`)
+    """
+    # the cache is keyed by the positional arguments: `f(1)`, `f(1, 0)` and `f(num_of_compensated=1)`
+    # have to be the same class, otherwise pickle finds the other class of the same name
+    return _gen_voltage_enum(int(num_of_compensated), int(num_of_trapped))
+
+
+@functools.lru_cache(maxsize=None)
+def _gen_voltage_enum(num_of_compensated: int, num_of_trapped: int):
+    """`gen_voltage_enum` for the normalized arguments"""
     voltages = {
         "EXCITATION": 1,
         "DETECTION": 2
@@ -132,7 +163,8 @@ def gen_voltage_enum(num_of_compensated=0, num_of_trapped=0):
         color_descript[last_num + 1] = (trapping_colors[i % len(trapping_colors)], f"Trapping electrode {i+1}")
         adjust_dict[last_num + 1] = 1
         last_num += 1
-    DynamicEnum = Voltages(f"VoltagesC{num_of_compensated}T{num_of_trapped}", voltages)
+    name = f"VoltagesC{num_of_compensated}T{num_of_trapped}"
+    DynamicEnum = Voltages(name, voltages, module=__name__, qualname=name)
     def _color_for_3d(self, voltage) -> Tuple[str, str]:
         return color_descript[voltage.value]
     DynamicEnum._color_for_3d = _color_for_3d
@@ -141,6 +173,14 @@ def gen_voltage_enum(num_of_compensated=0, num_of_trapped=0):
     DynamicEnum.to_adjust = to_adjust
     return DynamicEnum
 
+
+def __getattr__(name):
+    """the dynamic enums are found by pickle even if they were not created in this process yet"""
+    match = re.fullmatch(r"VoltagesC(\d+)T(\d+)", name)
+    if match is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return gen_voltage_enum(int(match.group(1)), int(match.group(2)))
+
 if __name__ == '__main__':
     e = gen_voltage_enum(2, 1)
     print(e.EXCITATION.colors_for_3d())
@@ -1,5 +1,7 @@
 from .abstract_trap import CoordsVar, Coords
-from .voltage_enums import CompensatedVoltages
+from .voltage_enums import CompensatedVoltages, select_voltage
+from .sectors import EXCITATION_SECTOR, in_sector
+from .segments import near_grid_points
 from .abstract_penning_with_simple_electrode_trap import AbstractPenningTrapWithSimpleElectrodes
 import numpy as np
 
@@ -13,6 +15,7 @@ class WangTrap(AbstractPenningTrapWithSimpleElectrodes):
 
     name = "wang_trap"
     _voltages = CompensatedVoltages
+    array_predicates = True
 
     def __init__(self, z0: float, a: float, delta_c: float, wire_num: int, pa_file_name="test", model_border=None, *, pts=150):
         self.wire_num = wire_num
@@ -23,34 +26,32 @@ class WangTrap(AbstractPenningTrapWithSimpleElectrodes):
     def is_endcap_electrode(self, coords: CoordsVar) -> bool:
         x, y, z = coords
         r, theta = np.sqrt(x**2+y**2), np.arctan2(y, x)
-        if r >= self.trap_border.x:
-            return False
-        return self.trap_border.z <= z <= self.trap_border.z + self.electrode_width
+        return (r < self.trap_border.x) & (self.trap_border.z <= z) & (z <= self.trap_border.z + self.electrode_width)
     
     def is_other_electrode(self, coords: CoordsVar) -> bool:
         w_step = self.trap_border.x / self.wire_num
         x, y, z = coords
-        if z > self.trap_border.z:
-            return False
         r, theta = np.sqrt(x ** 2 + y ** 2), np.arctan2(y, x)
-        if r > self.trap_border.x + self.electrode_width:
-            return False
-        if r > self.trap_border.x:
-            return True
-        if self.trap_border.z - self.delta_c - self.electrode_width <= z <= self.trap_border.z - self.delta_c:
-            for i in range(self.wire_num):
-                if (i * w_step - self.wire_rad) <= x <= (i * w_step + self.wire_rad):
-                    return True
-            for i in range(self.wire_num):
-                if (i * w_step - self.wire_rad) <= y <= (i * w_step + self.wire_rad):
-                    return True
-            return False
+        on_wire = (
+            near_grid_points(x, w_step, self.wire_num, self.wire_rad)
+            | near_grid_points(y, w_step, self.wire_num, self.wire_rad)
+        )
+        # the grid of wires
+        on_grid = (
+            (self.trap_border.z - self.delta_c - self.electrode_width <= z) & (z <= self.trap_border.z - self.delta_c)
+            & on_wire
+        )
+        return (
+            (z <= self.trap_border.z) & (r <= self.trap_border.x + self.electrode_width)
+            & ((r > self.trap_border.x) | on_grid)
+        )
 
     def calculate_nontrap_electrode_type(self, coords: CoordsVar):
         x, y, z = coords
         r, theta = np.sqrt(x ** 2 + y ** 2), np.arctan2(y, x)
-        if self.trap_border.x <= r <= self.trap_border.x + self.electrode_width:
-            if 0 <= theta <= np.pi/4:
-                return CompensatedVoltages.EXCITATION
-            return CompensatedVoltages.DETECTION
-        return CompensatedVoltages.COMPENSATED
+        on_ring = (self.trap_border.x <= r) & (r <= self.trap_border.x + self.electrode_width)
+        return select_voltage(
+            [on_ring & in_sector(theta, *EXCITATION_SECTOR), on_ring],
+            [CompensatedVoltages.EXCITATION, CompensatedVoltages.DETECTION],
+            CompensatedVoltages.COMPENSATED
+        )
@@ -1,8 +1,8 @@
-from queue import Queue
+import itertools
 
 import numpy as np
 from tqdm import tqdm_notebook as tqdm
-from typing import Tuple, List, Set, Optional, Callable
+from typing import Tuple, List, Optional, Callable
 from SIMION.PA import PA
 import math
 
@@ -12,16 +12,24 @@ AVERAGED_AREA_LENGTH = 10 * 10 ** -3
 
 
 def get_electrodes_slice(trap: AbstractTrap):
+    """electrode points of the x=0 plane with theirs potentials, unbent for -y and -z"""
+    if trap.axisymmetric:
+        # the plane of PA: x is z and y is r
+        js, ks = np.nonzero(trap.pa.electrode_mask()[0])
+        potentials = trap.pa.potential_real_many(ks, js, 0)
+    else:
+        ks, js = np.nonzero(trap.pa.electrode_mask()[:, :, 0])
+        potentials = trap.pa.potential_real_many(0, js, ks)
+    x = trap.grid.x[0]
+    # the radius of the axisymmetric model is along grid.x (as in `AbstractTrap._go_throw_slices`)
+    ys = trap.grid.x if trap.axisymmetric else trap.grid.y
     electrodes_and_types = []
-    for k, z in tqdm(enumerate(trap.grid.z), total=trap.model_lenghts.z):
-        for i, x in [(0, 0)]:
-            for j, y in enumerate(trap.grid.y):
-                # for each point in model space:
-                if trap.pa.electrode(i, j, k):
-                    electrodes_and_types.append(((x, y, z), trap.pa.potential_real(i, j, k)))
-                    electrodes_and_types.append(((x, -y, z), trap.pa.potential_real(i, -j, k)))
-                    electrodes_and_types.append(((x, y, -z), trap.pa.potential_real(i, j, -k)))
-                    electrodes_and_types.append(((x, -y, -z), trap.pa.potential_real(i, -j, -k)))
+    for k, j, potential in zip(ks, js, potentials):
+        y, z = ys[j], trap.grid.z[k]
+        electrodes_and_types.append(((x, y, z), potential))
+        electrodes_and_types.append(((x, -y, z), potential))
+        electrodes_and_types.append(((x, y, -z), potential))
+        electrodes_and_types.append(((x, -y, -z), potential))
     return electrodes_and_types
 
 
@@ -33,9 +41,8 @@ def get_averaged_phi(trap: AbstractTrap, r_pts=50, z_pts=50, max_r=AVERAGED_AREA
     Rs, Zs = np.meshgrid(rs, zs)
     Phi = np.zeros_like(Rs)
     for i in tqdm(range(Rs.shape[0])):
-        for j in range(Rs.shape[1]):
-            # calculate the 1 point - average over angle
-            Phi[i, j] = _get_averaged_phi_point(trap, Rs[i, j], Zs[i, j], max_r, max_z)
+        # calculate the whole row at once - average over angle
+        Phi[i, :] = _get_averaged_phi_point(trap, Rs[i, :], Zs[i, :], max_r, max_z)
     return _unbend_phi2D(Phi, Rs * max_r, Zs * max_z)
 
 
@@ -44,61 +51,35 @@ def _get_averaged_phi_point(trap: AbstractTrap, rfrac, zfrac, max_r, max_z, num_
     """
     average the electric potential for current r, z
     :param trap: the trap class
-    :param zfrac: the fraction of z from 0 to 1
-    :param rfrac: the fraction of r from 0 to 1
+    :param zfrac: the fraction of z from 0 to 1 (float or array)
+    :param rfrac: the fraction of r from 0 to 1 (float or array)
     :param max_r: what rfrac=1 is equ to
     :param max_z: what zfrac=1 is equ to
     :param num_th: the number of averaging points (may use default pts*pi/2)
-    :return: the mean value of potential
+    :return: the mean value of potential (of the same shape as rfrac and zfrac)
     """
-    if not num_th:
-        num_th = int(trap.pts*np.pi/2)
-    z = zfrac * max_z
-    r = rfrac * max_r
-    return np.mean(np.array(
-        [_numerical_phi_cylindrical(trap, z, r, theta) for theta in np.linspace(0, np.pi/2, num_th)]
-    ))
-
-
-def _numerical_phi_cylindrical(trap, z, r, theta):
-    """find phi in cylindrical coordinate"""
-    x = r*np.cos(theta)
-    y = r*np.sin(theta)
-    return _numerical_phi_cartesian(trap, Coords(x, y, z))
+    if trap.axisymmetric:
+        # the potential does not depend on angle
+        cos, sin = np.ones(1), np.zeros(1)
+    elif num_th:
+        thetas = np.linspace(0, np.pi/2, num_th)
+        cos, sin = np.cos(thetas), np.sin(thetas)
+    else:
+        cos, sin = trap.averaging_directions
+    # the last axis is for averaging over angle
+    z = np.asarray(zfrac * max_z)[..., np.newaxis]
+    r = np.asarray(rfrac * max_r)[..., np.newaxis]
+    return np.mean(_numerical_phi_cartesian(trap, Coords(r*cos, r*sin, z)), axis=-1)
 
 
 def _numerical_phi_cartesian(trap: AbstractTrap, coords: Coords[float]):
-    """return the electric potential from PA file in given point in space using the cartesian coords"""
-    # the point in space may not lay on grid. We need to average it
-    # 1) calculate the index of point (float, it will be averaged near closed grid
+    """return the electric potential from PA file in given point (or arrays of points) in space using the cartesian coords"""
+    # the point in space may not lay on grid. PA interpolates it from the closest grid points
     indexes_float = _get_float_ind(coords, trap.gridstepmm)
-    i = int(np.floor(indexes_float.x))
-    j = int(np.floor(indexes_float.y))
-    k = int(np.floor(indexes_float.z))
-    # return self.pa.potential_real(i, j, k) # for fast creating
-    # find potential in points near by
-    alpha = indexes_float.x - i
-    beta = indexes_float.y - j
-    gamma = indexes_float.z - k
-    p000 = trap.pa.potential_real(x=i, y=j, z=k)
-    p001 = trap.pa.potential_real(x=i, y=j, z=k + 1)
-    p010 = trap.pa.potential_real(x=i, y=j + 1, z=k)
-    p011 = trap.pa.potential_real(x=i, y=j + 1, z=k + 1)
-    p100 = trap.pa.potential_real(x=i + 1, y=j, z=k)
-    p101 = trap.pa.potential_real(x=i + 1, y=j, z=k + 1)
-    p110 = trap.pa.potential_real(x=i + 1, y=j + 1, z=k)
-    p111 = trap.pa.potential_real(x=i + 1, y=j + 1, z=k + 1)
-    # average with coefficients
-    return (
-            +(alpha) * (beta) * (gamma) * p111
-            + (alpha) * (1 - beta) * (gamma) * p101
-            + (alpha) * (beta) * (1 - gamma) * p110
-            + (alpha) * (1 - beta) * (1 - gamma) * p100
-            + (1 - alpha) * (beta) * (gamma) * p011
-            + (1 - alpha) * (1 - beta) * (gamma) * p001
-            + (1 - alpha) * (beta) * (1 - gamma) * p010
-            + (1 - alpha) * (1 - beta) * (1 - gamma) * p000
-    )
+    if trap.axisymmetric:
+        # PA with cylindrical symmetry: x is the axis, the radius is calculated from y and z
+        return trap.pa.potential_real_many(indexes_float.z, indexes_float.x, indexes_float.y)
+    return trap.pa.potential_real_many(indexes_float.x, indexes_float.y, indexes_float.z)
 
 
 def _get_float_ind(coords: Coords[float], gridstepmm: float) -> Coords[float]:
@@ -128,7 +109,7 @@ def expand_trap(trap: AbstractTrap, expand_range: Optional[Callable[[int], Optio
     :param trap:
     :return:
     """
-    trap.load_adjusted_pa("#")
+    trap.load_adjusted_pa("#", mmap=True)
     # get all electrodes and its types
     electrodes, e_types = get_all_electrodes(trap)
     # get mass centers of each electrode
@@ -146,124 +127,90 @@ def expand_trap(trap: AbstractTrap, expand_range: Optional[Callable[[int], Optio
     # find the dx, dy, dz from dr for all electrodes
     shifting = [_delta_move(*mc, r_delta=r_shift) for mc, r_shift in zip(mass_centers, r_shifts)]
     new_pa = trap.create_dump_pa()
+    nx, ny, nz = new_pa.size()
+    new_mask = np.zeros((nz, ny, nx), dtype=bool)
+    new_types = np.zeros((nz, ny, nx))
     for sh, electrode, e_type in zip(shifting, electrodes, e_types):
         # make shifting
         if math.isnan(sh[0]):
             sh = (0, 0, 0)
-        for i, j, k in tqdm(electrode):
-            if i < 0 or j < 0 or k < 0:
-                continue
-            new_i = int(i+sh[0])
-            new_j = int(j+sh[1])
-            new_k = int(k+sh[2])
-            try:
-                new_pa.point(new_i, new_j, new_k, 1, int(e_type))
-            except AssertionError:
-                pass
+        points = electrode[(electrode >= 0).all(axis=1)]
+        # int() of the shifted coordinates, as for a single point
+        new_i = (points[:, 0] + sh[0]).astype(int)
+        new_j = (points[:, 1] + sh[1]).astype(int)
+        new_k = (points[:, 2] + sh[2]).astype(int)
+        # the points shifted out of the model are lost
+        inside = (0 <= new_i) & (new_i < nx) & (0 <= new_j) & (new_j < ny) & (0 <= new_k) & (new_k < nz)
+        new_mask[new_k[inside], new_j[inside], new_i[inside]] = True
+        new_types[new_k[inside], new_j[inside], new_i[inside]] = int(e_type)
+    new_pa.set_points_from_mask(new_mask, new_types)
     new_pa.save(f"{trap.pa_filename}_expanded.pa#")
 
 
-def get_all_electrodes(trap: AbstractTrap, without_symmetry=True) -> Tuple[
-    List[
-        Set[Tuple[int, int, int]]
-    ],
-    List[float]
-]:
+def get_all_electrodes(trap: AbstractTrap, without_symmetry=True) -> Tuple[List[np.ndarray], List[float]]:
     """
-    without_symmetry - take into account xyz mirroring
-    return all electrodes of the trap as a 2 lists:
-    i-element of the first list is the set of 3-d points, i-element of the second is the electrode type
+    find the electrodes: the points of the same type connected by the faces, the edges or the corners.
+    The electrodes are unbent by xyz mirroring for the whole space, where the indexes are negative
+    without_symmetry - find only the electrodes that cross the stored 1/8 of space, otherwise all of them
+    return all electrodes of the trap (of more than 20 points) as a 2 lists:
+    i-element of the first list is the array of (i, j, k) of the points, i-element of the second is the electrode type
     """
-    visited_points = set()
+    from scipy import ndimage
+    mask = trap.pa.electrode_mask()
+    nz, ny, nx = mask.shape
+    ks, js, is_ = np.nonzero(mask)
+    types = np.zeros(mask.shape, dtype=int)
+    # the points of one electrode have the same integer part of the potential
+    types[ks, js, is_] = np.trunc(trap.pa.potential_real_many(is_, js, ks))
+    # only the stored 1/8 of space is labeled
+    labels = np.zeros(mask.shape, dtype=np.int64)
+    for electrode_type in np.unique(types[mask]):
+        type_labels, _ = ndimage.label(mask & (types == electrode_type), structure=np.ones((3, 3, 3)))
+        labels = np.where(type_labels > 0, type_labels + labels.max(), labels)
+    points = np.flatnonzero(labels)
+    point_labels = labels.ravel()[points]
+    k, j, i = np.unravel_index(points, labels.shape)
+    # (i, j, k) of the points of each stored part, the first is the first one in the (k, i, j) order
+    order = np.lexsort((j, i, k, point_labels))
+    ijk = np.stack([i, j, k], axis=1)[order]
+    point_labels = point_labels[order]
+    starts = np.flatnonzero(np.diff(point_labels, prepend=0))
+    ends = np.append(starts[1:], len(point_labels))
+    # the parts touching the mirror planes i=0, j=0, k=0
+    on_planes = np.logical_or.reduceat(ijk == 0, starts, axis=0)
+    parts = []
+    for part, first in enumerate(ijk[starts]):
+        # Any neighbour points of the whole space are in one of the mirrored 1/8, so a stored part is connected
+        # only with its own mirror images that share the points of the planes. Theirs union is an electrode.
+        # The electrodes of a part are the classes of the mirrorings (signs of i, j, k) modulo the planes
+        for signs in itertools.product(*[[1] if on_plane else [-1, 1] for on_plane in on_planes[part]]):
+            stored = all(sign > 0 for sign in signs)
+            # the order of the search by points: the stored points in (k, i, j) order,
+            # then theirs mirrors (the negative indexes first)
+            key = ((first[2] * nx + first[0]) * ny + first[1]) * 8
+            key += int(np.dot((first > 0) if stored else np.equal(signs, 1) & ~on_planes[part], [4, 2, 1]))
+            parts.append((not stored, key, part, np.array(signs)))
     electrodes = []
     e_types = []
-    for k, z in tqdm(enumerate(trap.grid.z), total=trap.model_lenghts.z):
-        for i, x in enumerate(trap.grid.x):
-            for j, y in enumerate(trap.grid.y):
-                # for each point in model space:
-                if trap.pa.electrode(i, j, k) and (i, j, k) not in visited_points:
-                    # if this is an electrode point and we were not here yet
-                    # use depth-first-search algorithm to visit all points of the electrode
-                    e, v = _dfs(i, j, k, trap)
-                    # add the result
-                    visited_points = visited_points.union(v)
-                    if len(e) > 20:
-                        electrodes.append(e)
-                        electrode_type = trap.pa.potential_real(i, j, k)
-                        e_types.append(electrode_type)
-    if not without_symmetry:
-        # without symmetry also check the all other 7/8 of space
-        for k_, z in tqdm(enumerate(trap.grid.z), total=trap.model_lenghts.z):
-            for i_, x in enumerate(trap.grid.x):
-                for j_, y in enumerate(trap.grid.y):
-                    # the next for unbending the 1/8 of space for the whole one
-                    for i, j, k in _gen_near_coords(i_, j_, k_, (-1, 1), delta=False):
-                        if trap.pa.electrode(abs(i), abs(j), abs(k)) and (i, j, k) not in visited_points:
-                            e, v = _dfs(i, j, k, trap)
-                            visited_points = visited_points.union(v)
-                            if len(e) > 20:
-                                electrodes.append(e)
-                                electrode_type = trap.pa.potential_real(i, j, k)
-                                e_types.append(electrode_type)
-
-    return electrodes, e_types
-
-
-def _dfs(i, j, k, trap: AbstractTrap):
-    """Depth-first search algorithm.  Find the whole electrode based on 1 point"""
-    visited_points = set()
-    gray_points = set()
-    queue = Queue()
-    gray_points.add((i, j, k))
-    queue.put((i, j, k))
-    an_electrode = set()
-    electrode_type = int(trap.pa.potential_real(abs(i), abs(j), abs(k)))
-    while not queue.empty():
-        # get new point to deal with
-        i, j, k = queue.get()
-        # because we have symmetry, use only abs of the points
-        abs_neighbor = (abs(i), abs(j), abs(k))
-        # if the point is outside the model space - do nothing
-        if abs_neighbor[0] >= trap.model_lenghts.x or abs_neighbor[1] >= trap.model_lenghts.y or abs_neighbor[2] >= trap.model_lenghts.z:
-            continue
-        # if the point is not electode - do nothing
-        if not trap.pa.electrode(*abs_neighbor):
+    for not_stored, key, part, signs in sorted(parts, key=lambda electrode: electrode[:2]):
+        if without_symmetry and not_stored:
             continue
-        # if we already visit this point - do nothing
-        if (i, j, k) in visited_points:
-            continue
-        # if it is a brand new point inside the electrode of the same type as the first one
-        if int(trap.pa.potential_real(*abs_neighbor)) == electrode_type:
-            # add this point to electrode points
-            an_electrode.add((i, j, k))
-        else:
-            continue
-
-        # and now we visit this point
-        visited_points.add((i, j, k))
-        for neighbor in _gen_near_coords(i, j, k, (-1, 0, 1)):
-            # get all neighbors of the point
-            if neighbor not in visited_points and neighbor not in gray_points:
-                # if the neighbor is not visited and not in queue already, add it to queue
-                gray_points.add(neighbor)
-                queue.put(neighbor)
-    return an_electrode, visited_points
-
-
-def _gen_near_coords(i, j, k, directions, delta=True):
-    """get coords near the given one"""
-    for i1 in directions:
-        for j1 in directions:
-            for k1 in directions:
-                if delta:
-                    yield i+i1, j+j1, k+k1
-                else:
-                    yield i*i1, j*j1, k*k1
+        part_ijk = ijk[starts[part]:ends[part]]
+        # the mirror images of the part across the planes it touches, the points of the planes are taken once
+        mirrors = []
+        for flips in itertools.product(*[[1, -1] if on_plane else [1] for on_plane in on_planes[part]]):
+            new = ~((part_ijk == 0) & (np.array(flips) < 0)).any(axis=1)
+            mirrors.append(part_ijk[new] * (signs * flips))
+        electrode = np.concatenate(mirrors)
+        if len(electrode) > 20:
+            electrodes.append(electrode)
+            e_types.append(trap.pa.potential_real(*part_ijk[0]))
+    return electrodes, e_types
 
 
-def _calculate_mass_center(electrode: Set[Tuple[int, int, int]]):
+def _calculate_mass_center(electrode: np.ndarray):
     """Calculate the mass center of the electrode"""
-    return np.array(list(electrode)).mean(axis=0)
+    return electrode.mean(axis=0)
 
 
 def _delta_move(x_mc, y_mc, z_mc, r_delta=0.02):